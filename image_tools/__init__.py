@@ -2,13 +2,8 @@
 图像处理工具模块
 提供多种图像处理功能
 """
-
-# 导入子模块和组件
-from .watermark import WatermarkRemoverTab
-from .convert import FormatConverterTab
-from .enhance import ImageEnhancerTab
-from .settings import SettingsTab
-from .utils.config_manager import ConfigManager
+# 公开组件在首次访问时才导入（见__getattr__），
+# 导入某个子模块（如image_tools.watermark）时不会连带加载其他功能模块
 
 # 公开接口
 __all__ = [
@@ -17,4 +12,22 @@ __all__ = [
     "ImageEnhancerTab",
     "SettingsTab",
     "ConfigManager"
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """按需导入公开组件（使用静态导入语句，便于PyInstaller分析依赖）"""
+    if name == "WatermarkRemoverTab":
+        from .watermark import WatermarkRemoverTab as value
+    elif name == "FormatConverterTab":
+        from .convert import FormatConverterTab as value
+    elif name == "ImageEnhancerTab":
+        from .enhance import ImageEnhancerTab as value
+    elif name == "SettingsTab":
+        from .settings import SettingsTab as value
+    elif name == "ConfigManager":
+        from .utils.config_manager import ConfigManager as value
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -10,7 +10,7 @@ from PIL import Image, ImageTk
 import threading
 from typing import List, Dict, Any, Optional
 
-from ..utils.image_utils import load_image, resize_image_for_display, get_image_for_tk
+from ..utils.image_utils import load_image, resize_image_for_display, get_image_for_tk, clear_tk_cache
 
 
 class FormatConverterTab(ttk.Frame):
@@ -286,6 +286,8 @@ class FormatConverterTab(ttk.Frame):
         # 加载图像
         image = load_image(file_path)
         if image:
+            # 丢弃上一张图像的显示缓存
+            clear_tk_cache()
             self.image = image
             self.image_path = file_path
             
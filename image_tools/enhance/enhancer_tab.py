@@ -11,7 +11,7 @@ import threading
 from typing import List, Dict, Any, Optional
 
 from ..utils.image_utils import (
-    load_image, resize_image_for_display, get_image_for_tk, 
+    load_image, resize_image_for_display, get_image_for_tk, clear_tk_cache,
     enhance_image, denoise_image, auto_adjust
 )
 
@@ -33,6 +33,8 @@ class ImageEnhancerTab(ttk.Frame):
         self.preview_image = None   # 预览图像
         self.image_path = None      # 当前图像路径
         self.tk_image = None        # Tkinter图像对象
+        self._canvas_w = 1          # 画布宽度，由<Configure>事件更新
+        self._canvas_h = 1          # 画布高度，由<Configure>事件更新
         self.batch_files = []       # 批量处理文件列表
         
         # 增强参数
@@ -78,6 +80,12 @@ class ImageEnhancerTab(ttk.Frame):
         self.canvas = tk.Canvas(self.display_frame, bg="#EEEEEE", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
+        # 常驻的图像项，显示新图像时只更新其内容和位置，不删除重建
+        self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, state="hidden")
+        
+        # 缓存画布尺寸，拖动滑块刷新预览时不再逐次向Tk查询
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        
         # 状态栏
         self.status_frame = ttk.Frame(self)
         self.status_frame.pack(fill=tk.X, side=tk.BOTTOM)
@@ -329,6 +337,8 @@ class ImageEnhancerTab(ttk.Frame):
         # 加载图像
         image = load_image(file_path)
         if image:
+            # 丢弃上一张图像的显示缓存
+            clear_tk_cache()
             self.original_image = image
             self.image_path = file_path
             self.enhanced_image = None
@@ -805,6 +815,11 @@ class ImageEnhancerTab(ttk.Frame):
         self.stop_button.config(state=tk.DISABLED)
         self._update_status("正在停止处理...")
     
+    def _on_canvas_configure(self, event):
+        """画布尺寸变化时更新缓存的尺寸"""
+        self._canvas_w = event.width
+        self._canvas_h = event.height
+    
     def _show_image(self, image):
         """在画布上显示图像
         
@@ -815,8 +830,8 @@ class ImageEnhancerTab(ttk.Frame):
             return
             
         # 获取画布大小
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        canvas_width = self._canvas_w
+        canvas_height = self._canvas_h
         
         # 如果画布尚未实际显示，使用默认大小
         if canvas_width <= 1:
@@ -834,9 +849,9 @@ class ImageEnhancerTab(ttk.Frame):
         x_pos = (canvas_width - resized_image.width) // 2
         y_pos = (canvas_height - resized_image.height) // 2
         
-        # 在画布上显示图像
-        self.canvas.delete("all")
-        self.canvas.create_image(x_pos, y_pos, anchor=tk.NW, image=self.tk_image)
+        # 在画布上显示图像（更新常驻的图像项）
+        self.canvas.itemconfigure(self.canvas_image, image=self.tk_image, state="normal")
+        self.canvas.coords(self.canvas_image, x_pos, y_pos)
     
     def _update_status(self, message):
         """更新状态栏信息
@@ -12,7 +12,7 @@ import cv2
 import numpy as np
 from typing import Optional, Dict, List, Any, Tuple
 
-from ..utils.image_utils import load_image, resize_image_for_display, get_image_for_tk
+from ..utils.image_utils import load_image, resize_image_for_display, get_image_for_tk, clear_tk_cache
 from ..utils.config_manager import ConfigManager
 from .ocr_translator import OCRTranslator
 
@@ -250,6 +250,8 @@ class OCRTranslatorTab(ttk.Frame):
         # 加载图像
         image = load_image(file_path)
         if image:
+            # 丢弃上一张图像的显示缓存
+            clear_tk_cache()
             self.image = image
             self.image_path = file_path
             
@@ -285,11 +285,15 @@ class SettingsTab(TabBase):
             temp_config.set_config("api_keys.volcano_engine_secret_key", secret_key)
             temp_config.set_config("api_keys.volcano_engine_region", region)
             
-            # 创建服务实例
+            # 创建服务实例（服务持有HTTP会话和线程池，检查完成后关闭）
             service = VolcanoOCRService(temp_config)
+            try:
+                keys_ok = service._check_api_keys()
+            finally:
+                service.close()
             
             # 检查API密钥是否已加载
-            if service._check_api_keys():
+            if keys_ok:
                 messagebox.showinfo("成功", "API密钥验证成功")
             else:
                 messagebox.showerror("错误", "API密钥无效")
@@ -46,9 +46,14 @@ class ConfigManager:
             "cache_dir": str(self.config_dir / "cache"),
             "cache_size": 1000,  # MB
             "log_level": "INFO",
+            # 火山引擎OCR上传图像的最大长边（像素），0表示不缩小
+            "volcano_max_edge": 1280,
+            # 火山引擎OCR提取文字/描述图像时是否在后台预取另一项结果（每次多一次计费请求）
+            "volcano_prefetch": False,
             # 水印去除设置
             "algorithm": "TELEA",     # 默认算法
             "inpaint_radius": 3,      # 默认修复半径
+            "advanced_method": "none",  # 高级修复方法，"poisson"为大面积区域泊松填充
             "brush_size": 10,         # 默认画笔大小
             # 最近使用的目录
             "last_image_dir": "",     # 上次打开图像的目录
@@ -56,12 +61,17 @@ class ConfigManager:
             "output_dir": "",         # 批处理输出目录
             # 批处理设置
             "max_workers": 4,         # 批处理最大线程数
+            "batch_fast_mode": False,  # 批处理快速模式（缩小后修复）
             # 其他设置
             "check_updates": True     # 是否检查更新
         }
         
         # 加载配置
         self.config = self.load_config()
+        
+        # 配置版本号，配置每次变更时递增，供调用方判断缓存的配置值是否过期
+        # （单例重复初始化会重新加载配置，同样视为一次变更）
+        self.version = getattr(self, "version", -1) + 1
     
     def load_config(self) -> Dict[str, Any]:
         """
@@ -124,6 +134,10 @@ class ConfigManager:
                 else:
                     self.config[key] = value
             
+            # 所有修改配置的方法最终都经由此处保存；版本号在写入新值之后递增，
+            # 其他线程读到新版本号时一定能读到新值
+            self.version += 1
+            
             # 保存到文件
             with open(self.config_file, "w", encoding="utf-8") as f:
                 json.dump(self.config, f, indent=4, ensure_ascii=False)
@@ -5,12 +5,22 @@
 """
 import os
 import io
+import threading
+import weakref
+from collections import OrderedDict
 import cv2
 import numpy as np
 from PIL import Image, ImageTk, ImageEnhance, ImageFilter, ExifTags
 from typing import Tuple, List, Dict, Optional, Union, Any
 import logging
 
+from . import _enhance_kernels
+
+
+# Pillow 9.1起重采样/翻转常量移至Image.Resampling/Image.Transpose，旧版本回退到Image模块上的常量
+_Resampling = getattr(Image, 'Resampling', Image)
+_Transpose = getattr(Image, 'Transpose', Image)
+
 
 def load_image(image_path: str) -> Optional[Image.Image]:
     """加载图像文件
@@ -60,15 +70,40 @@ def cv_to_pil(cv_image: np.ndarray) -> Image.Image:
     Returns:
         PIL图像对象
     """
-    # BGR转RGB
-    rgb = cv_image[:, :, ::-1]
+    # BGR转RGB，cvtColor输出连续内存，避免反向切片视图在fromarray中再tobytes一次
+    rgb = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+    
+    # 直接从连续缓冲区构建PIL图像
+    height, width = rgb.shape[:2]
+    return Image.frombuffer('RGB', (width, height), rgb, 'raw', 'RGB', 0, 1)
+
+
+def _reduce_for_resize(img: Image.Image, new_width: int, new_height: int) -> Image.Image:
+    """大比例缩小前先按整数倍盒式降采样
+    
+    Image.reduce在C层做整数倍平均，比直接Lanczos便宜得多，
+    之后只需对剩余的小于2倍的部分做精确重采样
+    
+    Args:
+        img: 输入图像
+        new_width: 最终目标宽度
+        new_height: 最终目标高度
+    
+    Returns:
+        降采样后的图像（无需降采样时返回原图像）
+    """
+    # reduce不支持二值图和调色板图
+    if img.mode in ('1', 'P') or new_width <= 0 or new_height <= 0:
+        return img
     
-    # numpy数组转为PIL
-    return Image.fromarray(rgb)
+    factor = int(min(img.width / new_width, img.height / new_height))
+    if factor >= 2:
+        return img.reduce(factor)
+    return img
 
 
 def resize_image(img: Image.Image, width: int, height: int, 
-                keep_aspect: bool = True, resample=Image.LANCZOS) -> Image.Image:
+                keep_aspect: bool = True, resample=_Resampling.LANCZOS) -> Image.Image:
     """调整图像大小
     
     Args:
@@ -94,6 +129,10 @@ def resize_image(img: Image.Image, width: int, height: int,
         new_width = int(img_width * scale)
         new_height = int(img_height * scale)
         
+        # 缩小时先整数倍降采样，再做剩余部分的重采样
+        if scale < 1:
+            img = _reduce_for_resize(img, new_width, new_height)
+        
         # 调整大小
         return img.resize((new_width, new_height), resample)
     else:
@@ -101,13 +140,27 @@ def resize_image(img: Image.Image, width: int, height: int,
         return img.resize((width, height), resample)
 
 
-def resize_image_for_display(img: Image.Image, max_width: int, max_height: int) -> Image.Image:
+# 显示用缩放结果的LRU缓存: (id(img), size, mode, max_w, max_h, resample) -> (原图弱引用, 缩放结果)
+_DISPLAY_CACHE_SIZE = 128
+_display_cache: "OrderedDict[tuple, Tuple[weakref.ref, Image.Image]]" = OrderedDict()
+
+
+def _drop_display_cache_entry(key: tuple):
+    """原图被回收时移除对应的缓存条目"""
+    _display_cache.pop(key, None)
+
+
+def resize_image_for_display(img: Image.Image, max_width: int, max_height: int,
+                             resample=_Resampling.LANCZOS) -> Image.Image:
     """调整图像大小以适合显示区域
     
+    结果按图像对象缓存，原地修改已显示过的图像（如paste、putpixel）后需调用clear_tk_cache
+    
     Args:
         img: 输入图像
         max_width: 最大宽度
         max_height: 最大高度
+        resample: 重采样方法，预览质量的缩略图可使用Image.BILINEAR进一步提速
     
     Returns:
         调整大小后的图像
@@ -118,6 +171,13 @@ def resize_image_for_display(img: Image.Image, max_width: int, max_height: int)
     if img_width <= max_width and img_height <= max_height:
         return img
     
+    # 命中缓存时直接返回（弱引用校验，防止id被新对象复用）
+    key = (id(img), img.size, img.mode, max_width, max_height, resample)
+    entry = _display_cache.get(key)
+    if entry is not None and entry[0]() is img:
+        _display_cache.move_to_end(key)
+        return entry[1]
+    
     # 计算缩放比例
     scale_w = max_width / img_width
     scale_h = max_height / img_height
@@ -129,24 +189,137 @@ def resize_image_for_display(img: Image.Image, max_width: int, max_height: int)
     new_width = int(img_width * scale)
     new_height = int(img_height * scale)
     
-    # 调整大小并返回
-    return img.resize((new_width, new_height), Image.LANCZOS)
+    # 先整数倍降采样，再做剩余部分的重采样
+    resized = _reduce_for_resize(img, new_width, new_height)
+    resized = resized.resize((new_width, new_height), resample)
+    
+    # 写入缓存，超出容量时淘汰最久未使用的条目
+    _display_cache[key] = (weakref.ref(img, lambda _ref, key=key: _drop_display_cache_entry(key)), resized)
+    while len(_display_cache) > _DISPLAY_CACHE_SIZE:
+        _display_cache.popitem(last=False)
+    
+    return resized
+
+
+# Tk图像注册表: (id(img), size, mode) -> (原图弱引用, PhotoImage)
+# 持有PhotoImage的强引用，原图被回收时自动移除
+_tk_image_cache: Dict[tuple, Tuple[weakref.ref, Any]] = {}
+
+
+def _drop_tk_cache_entry(key: tuple):
+    """原图被回收时移除对应的Tk图像"""
+    _tk_image_cache.pop(key, None)
 
 
 def get_image_for_tk(img: Image.Image) -> Any:
     """获取Tkinter可用的图像对象
     
+    同一图像重复调用时复用已创建的PhotoImage，原地修改图像后需调用clear_tk_cache
+    
     Args:
         img: PIL图像对象
     
     Returns:
         Tkinter兼容的图像对象
     """
+    key = (id(img), img.size, img.mode)
+    entry = _tk_image_cache.get(key)
+    if entry is not None and entry[0]() is img:
+        return entry[1]
+    
     try:
-        return ImageTk.PhotoImage(img)
+        photo = ImageTk.PhotoImage(img)
     except ImportError:
         logging.error("导入ImageTk失败，请确保已安装PIL或Pillow")
         return None
+    
+    _tk_image_cache[key] = (weakref.ref(img, lambda _ref, key=key: _drop_tk_cache_entry(key)), photo)
+    return photo
+
+
+def clear_tk_cache():
+    """清空显示缩放缓存和Tk图像注册表
+    
+    两者都按图像对象缓存，图像被原地修改后缓存内容会过期；
+    加载新图像或原地修改已显示的图像后调用
+    """
+    _display_cache.clear()
+    _tk_image_cache.clear()
+
+
+# 超过该字节数的图像在安装了numba时使用编译内核
+_NUMBA_MIN_BYTES = 1 << 20
+
+# ITU-R 601-2 亮度权重，与PIL的convert('L')一致
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _fused_enhance_array(arr: np.ndarray, brightness: float, contrast: float,
+                         color: float) -> np.ndarray:
+    """在单个float32缓冲区上依次完成亮度、对比度、色彩调整
+    
+    三者都是像素上的仿射运算，按ImageEnhance的公式原地计算，
+    避免每一步都分配一张完整的中间图像
+    
+    Args:
+        arr: RGB图像数组(H, W, 3)，uint8
+        brightness: 亮度系数
+        contrast: 对比度系数
+        color: 色彩系数
+    
+    Returns:
+        调整后的uint8数组
+    """
+    pixels = arr.astype(np.float32)
+    
+    # 亮度：向黑色插值
+    if brightness != 1.0:
+        pixels *= brightness
+        np.clip(pixels, 0, 255, out=pixels)
+    
+    # 对比度：围绕灰度均值缩放
+    if contrast != 1.0:
+        mean = int(float((pixels @ _LUMA_WEIGHTS).mean()) + 0.5)
+        pixels -= mean
+        pixels *= contrast
+        pixels += mean
+        np.clip(pixels, 0, 255, out=pixels)
+    
+    # 色彩：向灰度图插值
+    if color != 1.0:
+        luma = (pixels @ _LUMA_WEIGHTS)[..., None]
+        pixels -= luma
+        pixels *= color
+        pixels += luma
+        np.clip(pixels, 0, 255, out=pixels)
+    
+    pixels += 0.5
+    return pixels.astype(np.uint8)
+
+
+def _fused_enhance_image(img: Image.Image, brightness: float, contrast: float,
+                         color: float) -> Image.Image:
+    """对RGB图像一次性完成亮度、对比度、色彩调整
+    
+    Args:
+        img: RGB图像
+        brightness: 亮度系数
+        contrast: 对比度系数
+        color: 色彩系数
+    
+    Returns:
+        调整后的图像，系数均为1.0时返回原图
+    """
+    if brightness == 1.0 and contrast == 1.0 and color == 1.0:
+        return img
+    
+    arr = np.asarray(img)
+    if _enhance_kernels.NUMBA_AVAILABLE and arr.nbytes > _NUMBA_MIN_BYTES:
+        # 大图使用并行编译内核，在副本上原地计算
+        enhanced = _enhance_kernels.fused_enhance(np.array(arr), brightness, contrast, color)
+    else:
+        enhanced = _fused_enhance_array(arr, brightness, contrast, color)
+    return Image.fromarray(enhanced)
 
 
 def enhance_image(img: Image.Image, brightness: float = 1.0, contrast: float = 1.0, 
@@ -163,6 +336,20 @@ def enhance_image(img: Image.Image, brightness: float = 1.0, contrast: float = 1
     Returns:
         增强后的图像
     """
+    # 所有系数均为1.0时无需处理
+    if brightness == 1.0 and contrast == 1.0 and sharpness == 1.0 and color == 1.0:
+        return img
+    
+    # RGB图像用numpy融合计算亮度、对比度、色彩；保持原有顺序：亮度→对比度→锐度→色彩
+    if img.mode == 'RGB':
+        if sharpness == 1.0:
+            # 无锐度调整时三项可一次完成
+            return _fused_enhance_image(img, brightness, contrast, color)
+        
+        img = _fused_enhance_image(img, brightness, contrast, 1.0)
+        img = ImageEnhance.Sharpness(img).enhance(sharpness)
+        return _fused_enhance_image(img, 1.0, 1.0, color)
+    
     # 亮度调整
     if brightness != 1.0:
         enhancer = ImageEnhance.Brightness(img)
@@ -244,6 +431,14 @@ def crop_image(img: Image.Image, left: int, top: int, right: int, bottom: int) -
     return img.crop((left, top, right, bottom))
 
 
+# 顺时针直角旋转对应的transpose操作（PIL的ROTATE_*为逆时针）
+_RIGHT_ANGLE_TRANSPOSE = {
+    90: _Transpose.ROTATE_270,
+    180: _Transpose.ROTATE_180,
+    270: _Transpose.ROTATE_90,
+}
+
+
 def rotate_image(img: Image.Image, angle: float, expand: bool = True) -> Image.Image:
     """旋转图像
     
@@ -255,8 +450,16 @@ def rotate_image(img: Image.Image, angle: float, expand: bool = True) -> Image.I
     Returns:
         旋转后的图像
     """
+    angle = angle % 360
+    if angle == 0:
+        return img
+    
+    # 直角旋转只是像素重排，用transpose代替双三次插值（90/270度仅在扩展画布时尺寸一致）
+    if angle == 180 or (expand and angle in (90, 270)):
+        return img.transpose(_RIGHT_ANGLE_TRANSPOSE[angle])
+    
     # 旋转图像
-    return img.rotate(angle * -1, expand=expand, resample=Image.BICUBIC)
+    return img.rotate(angle * -1, expand=expand, resample=_Resampling.BICUBIC)
 
 
 def apply_filter(img: Image.Image, filter_name: str) -> Image.Image:
@@ -310,8 +513,11 @@ def overlay_images(background: Image.Image, foreground: Image.Image,
             new_data.append((item[0], item[1], item[2], int(item[3] * opacity)))
         foreground.putdata(new_data)
     
-    # 确保背景图像是RGBA模式
-    result = background.copy().convert('RGBA')
+    # 确保背景图像是RGBA模式（convert已返回新图像，仅同模式时需要复制以免修改原图）
+    if background.mode == 'RGBA':
+        result = background.copy()
+    else:
+        result = background.convert('RGBA')
     
     # 粘贴前景图像
     result.paste(foreground, position, foreground)
@@ -349,8 +555,9 @@ def create_image_grid(images: List[Image.Image], rows: int, cols: int,
     grid_width = cols * max_width + (cols + 1) * spacing
     grid_height = rows * max_height + (rows + 1) * spacing
     
-    # 创建网格图像
-    grid_img = Image.new('RGB', (grid_width, grid_height), bg_color)
+    # 创建网格画布，直接在numpy数组上按切片写入各图块
+    grid = np.empty((grid_height, grid_width, 3), dtype=np.uint8)
+    grid[:] = bg_color
     
     # 将图像放置到网格中
     for idx, img in enumerate(images):
@@ -369,10 +576,19 @@ def create_image_grid(images: List[Image.Image], rows: int, cols: int,
         x_offset = (max_width - img.width) // 2
         y_offset = (max_height - img.height) // 2
         
-        # 粘贴图像
-        grid_img.paste(img, (x + x_offset, y + y_offset))
+        # 写入图像
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        top = y + y_offset
+        left = x + x_offset
+        grid[top:top + img.height, left:left + img.width] = np.asarray(img)
     
-    return grid_img
+    return Image.fromarray(grid)
+
+
+# Exif子IFD与GPS IFD的指针标签
+_EXIF_IFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
 
 
 def extract_exif_data(img: Image.Image) -> Dict[str, Any]:
@@ -386,30 +602,34 @@ def extract_exif_data(img: Image.Image) -> Dict[str, Any]:
     """
     exif_data = {}
     
-    # 检查图像是否有EXIF数据
-    if hasattr(img, '_getexif') and img._getexif() is not None:
-        exif = img._getexif()
-        
-        # 遍历所有EXIF标签
-        for tag_id, value in exif.items():
-            # 查找标签名称
-            tag_name = ExifTags.TAGS.get(tag_id, tag_id)
-            
-            # 特殊处理一些标签
-            if tag_name == 'GPSInfo':
-                gps_data = {}
-                for key in value:
-                    gps_tag = ExifTags.GPSTAGS.get(key, key)
-                    gps_data[gps_tag] = value[key]
-                exif_data[tag_name] = gps_data
-            else:
-                exif_data[tag_name] = value
+    # getexif()的解析结果缓存在图像对象上，重复调用不会重新解析
+    exif = img.getexif()
+    if not exif:
+        return exif_data
+    
+    # 主IFD与Exif子IFD的标签（与旧版_getexif()的合并结果一致）
+    tags = dict(exif.items())
+    tags.pop(_EXIF_IFD_POINTER, None)
+    tags.pop(_GPS_IFD_POINTER, None)
+    tags.update(exif.get_ifd(_EXIF_IFD_POINTER))
+    
+    tag_names = ExifTags.TAGS
+    for tag_id, value in tags.items():
+        exif_data[tag_names.get(tag_id, tag_id)] = value
+    
+    # GPS信息单独映射标签名称
+    gps_ifd = exif.get_ifd(_GPS_IFD_POINTER)
+    if gps_ifd:
+        gps_tags = ExifTags.GPSTAGS
+        exif_data['GPSInfo'] = {gps_tags.get(key, key): value for key, value in gps_ifd.items()}
     
     return exif_data
 
 
 def save_image(img: Image.Image, path: str, format: str = None, 
-              quality: int = 95, keep_exif: bool = True) -> bool:
+              quality: int = 95, keep_exif: bool = True,
+              progressive: bool = False, subsampling: int = 2,
+              optimize: bool = False) -> bool:
     """保存图像
     
     Args:
@@ -418,6 +638,9 @@ def save_image(img: Image.Image, path: str, format: str = None,
         format: 图像格式，如'PNG', 'JPEG'等，None表示根据扩展名自动确定
         quality: 质量参数(1-100)，仅对JPEG有效
         keep_exif: 是否保留原始EXIF数据
+        progressive: 是否保存为渐进式JPEG，仅对JPEG有效
+        subsampling: 色度子采样(0=4:4:4, 1=4:2:2, 2=4:2:0)，仅对JPEG有效，存档用途可选0
+        optimize: 是否额外优化哈夫曼表（更慢），仅对JPEG有效
     
     Returns:
         保存是否成功
@@ -436,15 +659,24 @@ def save_image(img: Image.Image, path: str, format: str = None,
         
         # 规范化格式名称
         format = format.upper()
-        
-        # 处理EXIF数据
-        exif_data = None
-        if keep_exif and format == 'JPEG' and hasattr(img, '_getexif') and img._getexif() is not None:
-            exif_data = img.info.get('exif')
+        if format == 'JPG':
+            format = 'JPEG'
         
         # 保存图像
         if format == 'JPEG':
-            img.save(path, format=format, quality=quality, exif=exif_data)
+            save_kwargs = {
+                'quality': quality,
+                'progressive': progressive,
+                'subsampling': subsampling,
+                'optimize': optimize,
+            }
+            
+            # 直接沿用原始EXIF字节，无需解析
+            exif_data = img.info.get('exif') if keep_exif else None
+            if exif_data:
+                save_kwargs['exif'] = exif_data
+            
+            img.save(path, format=format, **save_kwargs)
         else:
             img.save(path, format=format)
         
@@ -491,10 +723,17 @@ def inpaint_image(img: Image.Image, mask: Image.Image, method: str = 'ns') -> Im
     """
     # 转换为OpenCV格式
     cv_img = pil_to_cv(img)
-    cv_mask = np.array(mask)
     
-    # 确保掩码是二值图像
-    _, cv_mask = cv2.threshold(cv_mask, 127, 255, cv2.THRESH_BINARY)
+    # 统一为单通道掩码，RGB/RGBA掩码直接阈值化会逐通道处理导致cv2.inpaint报错
+    if mask.mode == '1':
+        # 二值图转L后只有0/255，无需再阈值化
+        cv_mask = np.asarray(mask.convert('L'))
+    else:
+        if mask.mode != 'L':
+            mask = mask.convert('L')
+        
+        # 确保掩码是二值图像
+        _, cv_mask = cv2.threshold(np.asarray(mask), 127, 255, cv2.THRESH_BINARY)
     
     # 选择修复方法
     if method.lower() == 'telea':
@@ -520,9 +759,31 @@ def auto_contrast(img: Image.Image, cutoff: float = 0) -> Image.Image:
         调整后的图像
     """
     from PIL import ImageOps
+    
+    # 不裁剪时，各通道已占满0-255（或为单一值）的图像经过autocontrast保持不变
+    if cutoff == 0 and img.mode in ('L', 'RGB'):
+        extrema = img.getextrema()
+        if img.mode == 'L':
+            extrema = (extrema,)
+        if all(lo >= hi or (lo == 0 and hi == 255) for lo, hi in extrema):
+            return img
+    
     return ImageOps.autocontrast(img, cutoff)
 
 
+# CLAHE对象在apply时使用内部缓冲区，不能跨线程共享，按线程缓存
+_clahe_local = threading.local()
+
+
+def _get_clahe():
+    """获取当前线程复用的CLAHE对象"""
+    clahe = getattr(_clahe_local, 'clahe', None)
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        _clahe_local.clahe = clahe
+    return clahe
+
+
 def auto_adjust(img: Image.Image) -> Image.Image:
     """自动调整图像（颜色、对比度、亮度）
     
@@ -538,18 +799,11 @@ def auto_adjust(img: Image.Image) -> Image.Image:
     # 转换为LAB颜色空间
     lab = cv2.cvtColor(cv_img, cv2.COLOR_BGR2LAB)
     
-    # 分离LAB通道
-    l, a, b = cv2.split(lab)
-    
-    # 对亮度通道应用CLAHE
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    cl = clahe.apply(l)
-    
-    # 合并通道
-    adjusted_lab = cv2.merge((cl, a, b))
+    # 对亮度通道应用CLAHE，直接写回L通道，省去split/merge
+    lab[..., 0] = _get_clahe().apply(np.ascontiguousarray(lab[..., 0]))
     
     # 转回BGR颜色空间
-    adjusted_bgr = cv2.cvtColor(adjusted_lab, cv2.COLOR_LAB2BGR)
+    adjusted_bgr = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
     
     # 转回PIL格式
     return cv_to_pil(adjusted_bgr)
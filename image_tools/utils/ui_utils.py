@@ -6,6 +6,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
+import time
+import weakref
 from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 
 
@@ -129,11 +131,26 @@ def create_scrollable_frame(parent) -> Tuple[ttk.Frame, ttk.Frame]:
     canvas.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
     
-    # 绑定鼠标滚轮
+    # 绑定鼠标滚轮：仅在鼠标位于该画布内时接管全局滚轮事件，
+    # 避免多个滚动框架各自bind_all后互相覆盖/叠加
     def _on_mousewheel(event):
         canvas.yview_scroll(int(-1*(event.delta/120)), "units")
     
-    canvas.bind_all("<MouseWheel>", _on_mousewheel)
+    def _bind_mousewheel(event):
+        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+    
+    def _unbind_mousewheel(event):
+        # 移入画布内的子控件同样会触发Leave，此时保持绑定
+        widget = canvas.winfo_containing(event.x_root, event.y_root)
+        if widget is not None:
+            # 按路径判断是否为画布本身或其子控件（只比较前缀会把.!canvas2误判为.!canvas的子控件）
+            path, canvas_path = str(widget), str(canvas)
+            if path == canvas_path or path.startswith(canvas_path + "."):
+                return
+        canvas.unbind_all("<MouseWheel>")
+    
+    canvas.bind("<Enter>", _bind_mousewheel)
+    canvas.bind("<Leave>", _unbind_mousewheel)
     
     return container, scrollable_frame
 
@@ -172,6 +189,13 @@ def show_progress(parent, title: str, max_value: int) -> Tuple[tk.Toplevel, ttk.
     return dialog, progress, progress_label
 
 
+# 进度条最近一次刷新界面的时间，按控件记录（弱引用，控件释放后自动移除）
+_last_update_ts: "weakref.WeakKeyDictionary[ttk.Progressbar, float]" = weakref.WeakKeyDictionary()
+
+# 进度条刷新界面的最小间隔（秒）
+_PROGRESS_REFRESH_INTERVAL = 1 / 30
+
+
 def update_progress(progress: ttk.Progressbar, label: tk.Label, value: int):
     """更新进度条
     
@@ -180,13 +204,16 @@ def update_progress(progress: ttk.Progressbar, label: tk.Label, value: int):
         label: 标签控件
         value: 当前进度值
     """
+    maximum = progress["maximum"]
     progress["value"] = value
-    percent = int((value / progress["maximum"]) * 100)
+    percent = int((value / maximum) * 100)
     label.config(text=f"{percent}%")
     
-    # 更新UI
-    progress.update()
-    label.update()
+    # 限制重绘频率，只处理待绘制任务而不泵送整个事件循环；完成时总是刷新
+    now = time.monotonic()
+    if value >= maximum or now - _last_update_ts.get(progress, 0.0) >= _PROGRESS_REFRESH_INTERVAL:
+        _last_update_ts[progress] = now
+        progress.update_idletasks()
 
 
 def create_file_drag_drop(widget, callback: Callable[[str], None]):
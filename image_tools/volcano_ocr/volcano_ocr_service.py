@@ -4,12 +4,49 @@
 """
 
 import os
+import io
 import base64
+import hashlib
 import json
 import logging
-import requests
-from typing import Dict, Any, List, Generator, Optional
+from typing import Dict, Any, List, Generator, Optional, BinaryIO, TYPE_CHECKING
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# requests和PIL在首次使用时才导入，导入本模块不加载网络库和图像库
+if TYPE_CHECKING:
+    import requests
+
+# 优先使用orjson解析/序列化JSON，未安装时回退到标准库
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# Base64流式编码的读取块大小，必须是3的倍数
+_ENCODE_CHUNK_SIZE = 3 * 64 * 1024
+
+# 文字提取与图像描述使用的固定提示词
+EXTRACT_TEXT_PROMPT = "请识别并提取这张图片中的所有文字内容，按照图片中的布局排列。"
+DESCRIBE_IMAGE_PROMPT = "请详细描述这张图片的内容，包括场景、物体、人物、活动等关键信息。"
+
+# 上传图像默认的最大长边（像素），视觉模型不需要更高的分辨率
+_DEFAULT_MAX_EDGE = 1280
+
+# 缓存的图像编码结果数量
+_ENCODE_CACHE_SIZE = 8
+
+# 固定提示词分析结果的缓存数量与有效期（秒）
+_RESULT_CACHE_SIZE = 32
+_RESULT_CACHE_TTL = 3600
 
 class VolcanoOCRService:
     """
@@ -17,27 +54,86 @@ class VolcanoOCRService:
     提供图像文字识别、图像描述和问答功能
     """
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, max_edge: Optional[int] = None):
         """
         初始化火山引擎OCR服务
         
         Args:
             config_manager: 配置管理器实例
+            max_edge: 上传图像的最大长边像素，超过时先缩小；为None时读取配置，0表示不缩小
         """
         self.config_manager = config_manager
         self.logger = logging.getLogger(__name__)
         
+        # 上传图像的最大长边
+        if max_edge is None:
+            max_edge = config_manager.get_config("volcano_max_edge", _DEFAULT_MAX_EDGE)
+        self.max_edge = max_edge
+        
         # API密钥信息
         self.api_key = None
         self.secret_key = None
+        self._keys_version = -1
+        self._auth_headers: Dict[str, str] = {}
         self.region = "cn-beijing"
         
         # 视觉模型配置
         self.model_id = "doubao-1.5-ui-tars"
         
+        # 图像Base64编码缓存: (路径, 修改时间, 大小) -> 编码字符串
+        # 工作线程会并发调用，使用锁保护
+        self._enc_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._enc_cache_lock = threading.Lock()
+        
+        # 分析结果缓存: (图像SHA256, 提示词, 模型) -> (写入时间, 响应内容)
+        self._result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        
+        # 正在进行的分析请求，相同请求只发送一次
+        self._inflight: Dict[tuple, Future] = {}
+        
+        # 持久HTTP会话，复用到API服务器的keep-alive连接
+        self._session = self._create_session()
+        
         # 加载API密钥
         self._load_api_keys()
     
+    def _create_session(self) -> "requests.Session":
+        """
+        创建带连接池和重试策略的HTTP会话
+        
+        Returns:
+            requests.Session: HTTP会话
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # 保存模块引用，供异常处理使用
+        self._requests = requests
+        
+        session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+    
+    def close(self):
+        """关闭HTTP会话，释放连接池"""
+        self._session.close()
+    
+    def _warmup(self):
+        """
+        预先建立到API服务器的连接
+        
+        发送一个轻量的HEAD请求，使TCP/TLS握手在用户操作前完成，
+        连接随后留在会话的连接池中复用。任何错误都被忽略。
+        """
+        try:
+            self._session.head(f"https://visual.volces.com/{self.region}/", timeout=2)
+        except Exception as e:
+            self.logger.debug(f"Connection warmup failed: {str(e)}")
+    
     def _load_api_keys(self) -> bool:
         """
         从配置中加载API密钥
@@ -55,12 +151,39 @@ class VolcanoOCRService:
             if region:
                 self.region = region
             
+            # 预先生成认证请求头（Content-Type已设置在会话上）
+            self._auth_headers = {"Authorization": f"Bearer {self.api_key}:{self.secret_key}"}
+            
+            # 记录读取时的配置版本
+            self._keys_version = getattr(self.config_manager, "version", None)
+            
             return bool(self.api_key and self.secret_key)
         
         except Exception as e:
             self.logger.error(f"Failed to load API keys: {str(e)}", exc_info=True)
             return False
     
+    def _b64_stream(self, stream: BinaryIO) -> str:
+        """
+        分块读取并Base64编码二进制流
+        
+        按3的整数倍分块读取编码，块之间不会产生填充，
+        避免同时持有整个文件内容和编码结果
+        
+        Args:
+            stream: 二进制输入流
+            
+        Returns:
+            str: Base64编码字符串
+        """
+        encoded = bytearray()
+        while True:
+            chunk = stream.read(_ENCODE_CHUNK_SIZE)
+            if not chunk:
+                break
+            encoded.extend(base64.b64encode(chunk))
+        return encoded.decode("ascii")
+    
     def _encode_image(self, image_path: str) -> Optional[str]:
         """
         将图像编码为Base64字符串
@@ -75,15 +198,155 @@ class VolcanoOCRService:
             if not os.path.exists(image_path):
                 self.logger.error(f"Image file not found: {image_path}")
                 return None
-                
-            with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode("utf-8")
-                return encoded_string
+            
+            # 同一文件（路径、修改时间、大小均未变）直接复用编码结果
+            st = os.stat(image_path)
+            key = (image_path, st.st_mtime_ns, st.st_size, self.max_edge)
+            with self._enc_cache_lock:
+                cached = self._enc_cache.get(key)
+                if cached is not None:
+                    self._enc_cache.move_to_end(key)
+                    return cached
+            
+            # 长边超过上限的图像先缩小并重新编码为JPEG，显著减小上传体积；
+            # 打开图像只读取文件头，尺寸未超限时不解码像素
+            from PIL import Image, ImageOps
+            
+            encoded_string = None
+            try:
+                with Image.open(image_path) as img:
+                    if self.max_edge and max(img.size) > self.max_edge:
+                        # 重新编码会丢失EXIF，先按方向标记旋转像素，避免手机照片上传后方向错误
+                        img = ImageOps.exif_transpose(img)
+                        if img.mode != "RGB":
+                            img = img.convert("RGB")
+                        # Pillow 9.1起重采样常量移至Image.Resampling
+                        lanczos = getattr(Image, "Resampling", Image).LANCZOS
+                        img.thumbnail((self.max_edge, self.max_edge), lanczos)
+                        buffer = io.BytesIO()
+                        img.save(buffer, format="JPEG", quality=85, optimize=True)
+                        buffer.seek(0)
+                        encoded_string = self._b64_stream(buffer)
+            except (OSError, ValueError) as e:
+                # PIL无法读取的格式按原始文件上传
+                self.logger.warning(f"Failed to downscale image, uploading original: {str(e)}")
+                encoded_string = None
+            
+            if encoded_string is None:
+                with open(image_path, "rb") as image_file:
+                    encoded_string = self._b64_stream(image_file)
+            
+            with self._enc_cache_lock:
+                self._enc_cache[key] = encoded_string
+                while len(self._enc_cache) > _ENCODE_CACHE_SIZE:
+                    self._enc_cache.popitem(last=False)
+            
+            return encoded_string
         
         except Exception as e:
             self.logger.error(f"Failed to encode image: {str(e)}", exc_info=True)
             return None
     
+    def _hash_file(self, image_path: str) -> str:
+        """
+        分块计算文件内容的SHA256
+        
+        Args:
+            image_path: 图像文件路径
+            
+        Returns:
+            str: 十六进制摘要
+        """
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as image_file:
+            while True:
+                chunk = image_file.read(_ENCODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def clear_cache(self):
+        """清空图像编码缓存和分析结果缓存"""
+        with self._enc_cache_lock:
+            self._enc_cache.clear()
+        with self._result_cache_lock:
+            self._result_cache.clear()
+    
+    def _cached_analyze(self, image_path: str, prompt: str) -> Optional[str]:
+        """
+        分析图像并缓存响应内容，用于提示词固定的请求
+        
+        Args:
+            image_path: 图像文件路径
+            prompt: 分析提示
+            
+        Returns:
+            Optional[str]: 响应内容，响应中没有内容时返回None
+            
+        Raises:
+            ValueError: 当API密钥未配置或请求失败时
+        """
+        key = (self._hash_file(image_path), prompt, self.model_id)
+        
+        # 命中未过期的缓存时直接返回；相同请求正在进行时等待其结果
+        with self._result_cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < _RESULT_CACHE_TTL:
+                self._result_cache.move_to_end(key)
+                return entry[1]
+            
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            return pending.result()
+        
+        try:
+            result = self.analyze_image(image_path, prompt)
+            
+            # 提取响应内容
+            content = None
+            if "choices" in result and len(result["choices"]) > 0:
+                choice = result["choices"][0]
+                if "message" in choice and "content" in choice["message"]:
+                    content = choice["message"]["content"]
+            
+            with self._result_cache_lock:
+                if content is not None:
+                    self._result_cache[key] = (time.monotonic(), content)
+                    self._result_cache.move_to_end(key)
+                    while len(self._result_cache) > _RESULT_CACHE_SIZE:
+                        self._result_cache.popitem(last=False)
+                self._inflight.pop(key, None)
+            
+            pending.set_result(content)
+            return content
+        
+        except BaseException as e:
+            with self._result_cache_lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+    
+    def prefetch(self, image_path: str, prompt: str):
+        """
+        在后台预先获取分析结果以填充缓存，错误被忽略
+        
+        Args:
+            image_path: 图像文件路径
+            prompt: 分析提示
+        """
+        try:
+            self._cached_analyze(image_path, prompt)
+        except Exception as e:
+            self.logger.debug(f"Prefetch failed: {str(e)}")
+    
     def _check_api_keys(self) -> bool:
         """
         检查API密钥是否已配置
@@ -91,10 +354,13 @@ class VolcanoOCRService:
         Returns:
             bool: 密钥是否已配置
         """
-        if not self.api_key or not self.secret_key:
-            if not self._load_api_keys():
-                self.logger.error("API keys not configured")
-                return False
+        # 配置未变更且密钥已加载时无需重新读取
+        if self.api_key and self.secret_key and self._keys_version == getattr(self.config_manager, "version", None):
+            return True
+        
+        if not self._load_api_keys():
+            self.logger.error("API keys not configured")
+            return False
         return True
     
     def analyze_image(self, image_path: str, prompt: str) -> Dict[str, Any]:
@@ -134,18 +400,12 @@ class VolcanoOCRService:
             ]
         }
         
-        # 构建请求头
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}:{self.secret_key}"
-        }
-        
         # 发送请求
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"https://visual.volces.com/{self.region}/api/v1/chat/completions",
-                headers=headers,
-                json=payload
+                headers=self._auth_headers,
+                data=_json_dumps(payload)
             )
             
             # 检查响应状态
@@ -155,10 +415,10 @@ class VolcanoOCRService:
                 raise ValueError(error_msg)
                 
             # 解析响应
-            result = response.json()
+            result = _json_loads(response.content)
             return result
             
-        except requests.RequestException as e:
+        except self._requests.RequestException as e:
             error_msg = f"API请求异常: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
             raise ValueError(error_msg)
@@ -176,16 +436,12 @@ class VolcanoOCRService:
         Raises:
             ValueError: 当API密钥未配置或请求失败时
         """
-        prompt = "请识别并提取这张图片中的所有文字内容，按照图片中的布局排列。"
+        prompt = EXTRACT_TEXT_PROMPT
         
         try:
-            result = self.analyze_image(image_path, prompt)
-            
-            # 提取响应内容
-            if "choices" in result and len(result["choices"]) > 0:
-                choice = result["choices"][0]
-                if "message" in choice and "content" in choice["message"]:
-                    return choice["message"]["content"]
+            content = self._cached_analyze(image_path, prompt)
+            if content is not None:
+                return content
             
             return "未能识别出文字内容"
             
@@ -206,16 +462,12 @@ class VolcanoOCRService:
         Raises:
             ValueError: 当API密钥未配置或请求失败时
         """
-        prompt = "请详细描述这张图片的内容，包括场景、物体、人物、活动等关键信息。"
+        prompt = DESCRIBE_IMAGE_PROMPT
         
         try:
-            result = self.analyze_image(image_path, prompt)
-            
-            # 提取响应内容
-            if "choices" in result and len(result["choices"]) > 0:
-                choice = result["choices"][0]
-                if "message" in choice and "content" in choice["message"]:
-                    return choice["message"]["content"]
+            content = self._cached_analyze(image_path, prompt)
+            if content is not None:
+                return content
             
             return "未能生成图像描述"
             
@@ -252,6 +504,41 @@ class VolcanoOCRService:
             self.logger.error(f"Question answering failed: {str(e)}", exc_info=True)
             raise ValueError(f"回答问题失败: {str(e)}")
     
+    def _iter_sse_data(self, response: "requests.Response") -> Generator[bytes, None, None]:
+        """
+        按原始字节切分SSE流，逐个产出"data: "帧的内容
+        
+        Args:
+            response: 以stream=True发起的响应
+            
+        Yields:
+            bytes: 去掉"data: "前缀的帧内容
+        """
+        buffer = bytearray()
+        
+        # chunk_size=None按网络到达的块读取，既减少逐行解码的开销又不会等待凑满固定大小
+        for data in response.iter_content(chunk_size=None):
+            buffer.extend(data)
+            
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                
+                line = buffer[start:end]
+                start = end + 1
+                
+                if line[:6] == b"data: ":
+                    yield bytes(line[6:]).rstrip(b"\r")
+            
+            # 丢弃已处理的完整行，保留不完整的尾部
+            del buffer[:start]
+        
+        # 处理没有以换行结尾的最后一帧
+        if buffer[:6] == b"data: ":
+            yield bytes(buffer[6:]).rstrip(b"\r")
+    
     def chat_stream(self, image_path: str, question: str) -> Generator[str, None, None]:
         """
         流式回答关于图像的问题
@@ -289,18 +576,12 @@ class VolcanoOCRService:
             ]
         }
         
-        # 构建请求头
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}:{self.secret_key}"
-        }
-        
         # 发送请求并处理流式响应
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"https://visual.volces.com/{self.region}/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
+                headers=self._auth_headers,
+                data=_json_dumps(payload),
                 stream=True
             )
             
@@ -311,29 +592,23 @@ class VolcanoOCRService:
                 raise ValueError(error_msg)
             
             # 处理流式响应
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode("utf-8")
-                    
-                    # 跳过空行和前缀
-                    if not line.strip() or line.startswith("data: [DONE]"):
-                        continue
-                    
-                    # 提取JSON数据
-                    if line.startswith("data: "):
-                        data = line[6:]  # 移除 "data: " 前缀
-                        try:
-                            chunk = json.loads(data)
-                            if "choices" in chunk and len(chunk["choices"]) > 0:
-                                choice = chunk["choices"][0]
-                                if "delta" in choice and "content" in choice["delta"]:
-                                    content = choice["delta"]["content"]
-                                    if content:
-                                        yield content
-                        except json.JSONDecodeError:
-                            self.logger.warning(f"Failed to decode JSON from line: {line}")
-        
-        except requests.RequestException as e:
+            for data in self._iter_sse_data(response):
+                # 跳过结束标记
+                if data == b"[DONE]":
+                    continue
+                
+                try:
+                    chunk = _json_loads(data)
+                    if "choices" in chunk and len(chunk["choices"]) > 0:
+                        choice = chunk["choices"][0]
+                        if "delta" in choice and "content" in choice["delta"]:
+                            content = choice["delta"]["content"]
+                            if content:
+                                yield content
+                except ValueError:
+                    self.logger.warning(f"Failed to decode JSON from line: {data!r}")
+        
+        except self._requests.RequestException as e:
             error_msg = f"API请求异常: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
             raise ValueError(error_msg) 
\ No newline at end of file
@@ -7,14 +7,26 @@ import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
 import logging
 import os
-from PIL import Image, ImageTk
-from typing import Optional, Tuple, Dict, Any, List
-import threading
+from typing import Optional, Tuple, Dict, Any, List, Callable
 import time
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 
 from image_tools.core.tab_base import TabBase
-from image_tools.utils.image_utils import load_image, resize_image
-from image_tools.volcano_ocr.volcano_ocr_service import VolcanoOCRService
+from image_tools.volcano_ocr.volcano_ocr_service import (
+    VolcanoOCRService, EXTRACT_TEXT_PROMPT, DESCRIBE_IMAGE_PROMPT
+)
+
+# 流式回答写入聊天区域的间隔（毫秒）
+_CHAT_DRAIN_INTERVAL_MS = 30
+
+# 缓存的显示尺寸数量
+_RESIZE_CACHE_SIZE = 4
+
+# 画布尺寸变化后重绘的延迟（毫秒）
+_RESIZE_DEBOUNCE_MS = 80
 
 class VolcanoOCRTab(TabBase):
     """
@@ -42,6 +54,17 @@ class VolcanoOCRTab(TabBase):
         self.display_image = None
         self.photo_image = None
         
+        # 显示尺寸缓存: (画布宽//8, 画布高//8) -> (缩放后图像, PhotoImage)
+        self._resize_cache: "OrderedDict[Tuple[int, int], Tuple[Any, Any]]" = OrderedDict()
+        self._last_canvas_size = (0, 0)
+        
+        # 后台任务线程池，以及每类操作最近一次提交的任务和取消时的收尾函数
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="volcano-ocr")
+        self._futures: Dict[str, Tuple[Future, Optional[Callable[[], None]]]] = {}
+        
+        # 流式回答片段队列，None表示流结束
+        self._chat_q: "queue.Queue[Optional[str]]" = queue.Queue()
+        
         # 创建标签页UI
         self._create_widgets()
         
@@ -70,6 +93,10 @@ class VolcanoOCRTab(TabBase):
         self.canvas = tk.Canvas(image_frame, bg="white", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # 画布尺寸变化时延迟重绘，拖动窗口期间只处理最后一次
+        self._resize_after_id = None
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        
         # 图像操作按钮
         button_frame = ttk.Frame(left_frame)
         button_frame.pack(fill=tk.X, pady=(0, 5))
@@ -113,10 +140,13 @@ class VolcanoOCRTab(TabBase):
         assistant_frame = ttk.LabelFrame(right_frame, text="AI视觉助手")
         assistant_frame.pack(fill=tk.BOTH, expand=True)
         
+        # 流式回答会频繁插入文本，关闭撤销以免为每次插入记录撤销信息
         self.chat_text = scrolledtext.ScrolledText(
             assistant_frame,
             wrap=tk.WORD,
-            height=10
+            height=10,
+            undo=False,
+            autoseparators=False
         )
         self.chat_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
@@ -138,10 +168,36 @@ class VolcanoOCRTab(TabBase):
         # 绑定回车键
         self.question_entry.bind("<Return>", lambda event: self.send_message())
     
+    def _submit(self, action: str, worker, on_cancel: Optional[Callable[[], None]] = None) -> Future:
+        """
+        提交后台任务，同类操作尚未开始的旧任务会被取消
+        
+        Args:
+            action: 操作名称
+            worker: 任务函数
+            on_cancel: 任务未开始就被取消时调用的收尾函数，
+                       完成任务函数finally中本应完成的UI恢复
+            
+        Returns:
+            Future: 提交的任务
+        """
+        previous = self._futures.get(action)
+        if previous is not None:
+            previous_future, previous_on_cancel = previous
+            # 只有尚未开始的任务能取消成功，它的finally不会执行
+            if previous_future.cancel() and previous_on_cancel is not None:
+                previous_on_cancel()
+        
+        future = self._executor.submit(worker)
+        self._futures[action] = (future, on_cancel)
+        return future
+    
     def _check_api_settings(self):
         """检查API设置状态并更新UI"""
         if self.service._load_api_keys():
             self.update_status("API配置已加载")
+            # 后台预热连接，隐藏首次请求的握手延迟
+            self._submit("warmup", self.service._warmup)
         else:
             self.show_warning("API未配置", "请在设置中配置火山引擎API密钥")
     
@@ -183,6 +239,9 @@ class VolcanoOCRTab(TabBase):
             bool: 是否成功加载图像
         """
         try:
+            # 图像处理模块依赖OpenCV等较重的库，首次使用时才导入
+            from image_tools.utils.image_utils import load_image
+            
             # 加载图像
             result = load_image(image_path)
             
@@ -192,6 +251,10 @@ class VolcanoOCRTab(TabBase):
             
             self.original_image = result
             
+            # 新图像需要重新缩放
+            self._resize_cache.clear()
+            self.photo_image = None
+            
             # 更新图像显示
             self.update_image_display()
             return True
@@ -214,12 +277,33 @@ class VolcanoOCRTab(TabBase):
             if canvas_height <= 1:
                 canvas_height = 300
             
-            # 调整图像大小以适应画布
-            resized_image = resize_image(self.original_image, canvas_width, canvas_height)
+            # 画布尺寸几乎没有变化时保持当前显示
+            last_width, last_height = self._last_canvas_size
+            if (self.photo_image is not None
+                    and abs(canvas_width - last_width) < 4
+                    and abs(canvas_height - last_height) < 4):
+                return
+            self._last_canvas_size = (canvas_width, canvas_height)
+            
+            # 按8像素分桶复用已缩放的图像
+            key = (canvas_width // 8, canvas_height // 8)
+            entry = self._resize_cache.get(key)
+            if entry is None:
+                from PIL import ImageTk
+                from image_tools.utils.image_utils import resize_image
+                
+                # 调整图像大小以适应画布
+                resized_image = resize_image(self.original_image, canvas_width, canvas_height)
+                
+                # 创建PhotoImage对象用于显示
+                entry = (resized_image, ImageTk.PhotoImage(resized_image))
+                self._resize_cache[key] = entry
+                while len(self._resize_cache) > _RESIZE_CACHE_SIZE:
+                    self._resize_cache.popitem(last=False)
+            else:
+                self._resize_cache.move_to_end(key)
             
-            # 创建PhotoImage对象用于显示
-            self.display_image = resized_image
-            self.photo_image = ImageTk.PhotoImage(self.display_image)
+            self.display_image, self.photo_image = entry
             
             # 清除画布并显示新图像
             self.canvas.delete("all")
@@ -230,6 +314,17 @@ class VolcanoOCRTab(TabBase):
                 anchor=tk.CENTER
             )
     
+    def _on_canvas_configure(self, event):
+        """画布尺寸变化时的防抖处理"""
+        if self._resize_after_id:
+            self.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.after(_RESIZE_DEBOUNCE_MS, self._on_resize_timeout)
+    
+    def _on_resize_timeout(self):
+        """防抖结束后重绘图像"""
+        self._resize_after_id = None
+        self.update_image_display()
+    
     def extract_text(self):
         """提取图像中的文字"""
         if not self.image_path or not self.original_image:
@@ -238,7 +333,7 @@ class VolcanoOCRTab(TabBase):
         
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, "正在提取文字，请稍候...\n")
-        self.update()
+        self.update_idletasks()
         
         # 禁用按钮
         self.extract_text_btn.configure(state=tk.DISABLED)
@@ -246,7 +341,7 @@ class VolcanoOCRTab(TabBase):
         self.send_btn.configure(state=tk.DISABLED)
         
         try:
-            # 创建线程执行文字提取
+            # 在线程池中执行文字提取
             def extract_thread():
                 try:
                     # 调用服务提取文字
@@ -262,13 +357,25 @@ class VolcanoOCRTab(TabBase):
                     # 重新启用按钮
                     self.after(0, lambda: self._enable_buttons())
             
-            # 启动线程
-            threading.Thread(target=extract_thread, daemon=True).start()
+            # 提交到线程池，开启预取时在后台预取图像描述（结果进入服务缓存）
+            self._submit("extract", extract_thread, self._enable_buttons)
+            self._prefetch(DESCRIBE_IMAGE_PROMPT)
             
         except Exception as e:
             self.show_error("操作失败", f"提取文字时出错: {str(e)}")
             self._enable_buttons()
     
+    def _prefetch(self, prompt: str):
+        """配置开启预取时，在后台获取另一项分析的结果
+        
+        预取会额外发送一次计费的API请求，默认关闭
+        
+        Args:
+            prompt: 预取的分析提示
+        """
+        if self.config_manager.get_config("volcano_prefetch", False):
+            self._submit("prefetch", partial(self.service.prefetch, self.image_path, prompt))
+    
     def describe_image(self):
         """描述图像内容"""
         if not self.image_path or not self.original_image:
@@ -277,7 +384,7 @@ class VolcanoOCRTab(TabBase):
         
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, "正在分析图像，请稍候...\n")
-        self.update()
+        self.update_idletasks()
         
         # 禁用按钮
         self.extract_text_btn.configure(state=tk.DISABLED)
@@ -285,7 +392,7 @@ class VolcanoOCRTab(TabBase):
         self.send_btn.configure(state=tk.DISABLED)
         
         try:
-            # 创建线程执行图像描述
+            # 在线程池中执行图像描述
             def describe_thread():
                 try:
                     # 调用服务描述图像
@@ -301,8 +408,9 @@ class VolcanoOCRTab(TabBase):
                     # 重新启用按钮
                     self.after(0, lambda: self._enable_buttons())
             
-            # 启动线程
-            threading.Thread(target=describe_thread, daemon=True).start()
+            # 提交到线程池，开启预取时在后台预取文字提取结果（结果进入服务缓存）
+            self._submit("describe", describe_thread, self._enable_buttons)
+            self._prefetch(EXTRACT_TEXT_PROMPT)
             
         except Exception as e:
             self.show_error("操作失败", f"描述图像时出错: {str(e)}")
@@ -326,7 +434,7 @@ class VolcanoOCRTab(TabBase):
         self.chat_text.insert(tk.END, f"你: {question}\n\n")
         self.chat_text.insert(tk.END, "AI助手: ")
         self.chat_text.see(tk.END)
-        self.update()
+        self.update_idletasks()
         
         # 禁用按钮
         self.extract_text_btn.configure(state=tk.DISABLED)
@@ -334,7 +442,7 @@ class VolcanoOCRTab(TabBase):
         self.send_btn.configure(state=tk.DISABLED)
         
         try:
-            # 创建线程执行问答
+            # 在线程池中执行问答
             def answer_thread():
                 try:
                     # 调用服务回答问题
@@ -343,27 +451,28 @@ class VolcanoOCRTab(TabBase):
                     # 使用流式响应
                     for chunk in self.service.chat_stream(self.image_path, question):
                         answer += chunk
-                        # 在主线程中更新UI
-                        self.after(0, lambda c=chunk: self._update_chat_text(c))
+                        # 放入队列，由主线程定时批量写入
+                        self._chat_q.put(chunk)
                     
                     # 添加换行
-                    self.after(0, lambda: self.chat_text.insert(tk.END, "\n\n"))
-                    self.after(0, lambda: self.chat_text.see(tk.END))
+                    self._chat_q.put("\n\n")
                     
                 except Exception as e:
                     error_msg = f"回答问题时出错: {str(e)}"
                     self.logger.error(error_msg, exc_info=True)
                     self.after(0, lambda: self.show_error("回答失败", error_msg))
                     # 添加错误提示到聊天窗口
-                    self.after(0, lambda: self.chat_text.insert(tk.END, f"[错误: {str(e)}]\n\n"))
-                    self.after(0, lambda: self.chat_text.see(tk.END))
+                    self._chat_q.put(f"[错误: {str(e)}]\n\n")
                     
                 finally:
+                    # 通知主线程流已结束
+                    self._chat_q.put(None)
                     # 重新启用按钮
                     self.after(0, lambda: self._enable_buttons())
             
-            # 启动线程
-            threading.Thread(target=answer_thread, daemon=True).start()
+            # 提交到线程池，并开始定时读取队列
+            self._submit("chat", answer_thread, self._finish_cancelled_chat)
+            self.after(_CHAT_DRAIN_INTERVAL_MS, self._drain_chat_queue)
             
         except Exception as e:
             self.show_error("操作失败", f"回答问题时出错: {str(e)}")
@@ -381,6 +490,32 @@ class VolcanoOCRTab(TabBase):
         self.chat_text.insert(tk.END, text_chunk)
         self.chat_text.see(tk.END)
     
+    def _drain_chat_queue(self):
+        """取出队列中积累的所有回答片段，一次性写入聊天文本区域"""
+        chunks = []
+        finished = False
+        while True:
+            try:
+                chunk = self._chat_q.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                finished = True
+                break
+            chunks.append(chunk)
+        
+        if chunks:
+            self._update_chat_text("".join(chunks))
+        
+        # 流未结束时继续定时读取
+        if not finished:
+            self.after(_CHAT_DRAIN_INTERVAL_MS, self._drain_chat_queue)
+    
+    def _finish_cancelled_chat(self):
+        """未开始就被取消的问答任务的收尾：结束它对应的队列读取并重新启用按钮"""
+        self._chat_q.put(None)
+        self._enable_buttons()
+    
     def _enable_buttons(self):
         """重新启用按钮"""
         if self.original_image:
@@ -400,4 +535,10 @@ class VolcanoOCRTab(TabBase):
     def refresh(self):
         """刷新标签页"""
         # 检查API设置
-        self._check_api_settings() 
\ No newline at end of file
+        self._check_api_settings()
+    
+    def destroy(self):
+        """销毁标签页时停止后台任务并释放服务持有的连接"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.service.close()
+        super().destroy() 
\ No newline at end of file
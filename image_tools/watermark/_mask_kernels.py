@@ -0,0 +1,97 @@
+"""
+水印掩码加速内核
+
+使用Numba将画布坐标转换等逐次调用的标量计算编译为机器码，
+未安装numba时NUMBA_AVAILABLE为False，函数以纯Python方式运行，结果一致；
+掩码缩放二值化内核仅在NUMBA_AVAILABLE时可用，调用方应回退到OpenCV实现
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _canvas_to_image_coords(cx, cy, canvas_w, canvas_h, img_w, img_h, scale):
+    """将画布坐标转换为图像坐标（图像在画布上居中显示）
+
+    Args:
+        cx: 画布x坐标
+        cy: 画布y坐标
+        canvas_w: 画布宽度
+        canvas_h: 画布高度
+        img_w: 图像宽度
+        img_h: 图像高度
+        scale: 显示缩放因子
+
+    Returns:
+        图像坐标(x, y)，已裁剪到图像范围内
+    """
+    # 图像在画布上的位置（居中）
+    x_offset = max(0, (canvas_w - int(img_w * scale)) // 2)
+    y_offset = max(0, (canvas_h - int(img_h * scale)) // 2)
+
+    img_x = int((cx - x_offset) / scale)
+    img_y = int((cy - y_offset) / scale)
+
+    # 确保坐标在图像范围内
+    img_x = max(0, min(img_x, img_w - 1))
+    img_y = max(0, min(img_y, img_h - 1))
+    return img_x, img_y
+
+
+def _display_geometry(canvas_w, canvas_h, img_w, img_h):
+    """计算图像适应画布显示（留出10%边距）时的尺寸与预缩小倍数
+
+    Args:
+        canvas_w: 画布宽度
+        canvas_h: 画布高度
+        img_w: 图像宽度
+        img_h: 图像高度
+
+    Returns:
+        (显示宽度, 显示高度, 预缩小倍数)，预缩小倍数保证最终缩放至少还有2倍
+    """
+    scale = min(canvas_w / img_w, canvas_h / img_h) * 0.9
+    prereduce = max(1, int(1.0 / scale / 2))
+    return int(img_w * scale), int(img_h * scale), prereduce
+
+
+if NUMBA_AVAILABLE:
+    canvas_to_image_coords = njit(cache=True)(_canvas_to_image_coords)
+    display_geometry = njit(cache=True)(_display_geometry)
+else:
+    canvas_to_image_coords = _canvas_to_image_coords
+    display_geometry = _display_geometry
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True)
+    def _resize_binarize(src, dst):
+        """逐行并行地完成最近邻缩放与二值化"""
+        src_h, src_w = src.shape[0], src.shape[1]
+        dst_h, dst_w = dst.shape[0], dst.shape[1]
+        scale_y = src_h / dst_h
+        scale_x = src_w / dst_w
+        for y in prange(dst_h):
+            sy = min(int(y * scale_y), src_h - 1)
+            for x in range(dst_w):
+                sx = min(int(x * scale_x), src_w - 1)
+                dst[y, x] = 255 if src[sy, sx] > 127 else 0
+
+
+def resize_binarize(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """将掩码最近邻缩放到dst的尺寸并二值化（大于127为255，否则为0），一次写入dst
+
+    Args:
+        src: 单通道uint8掩码
+        dst: 可写的单通道uint8输出数组，尺寸即目标尺寸
+
+    Returns:
+        输出掩码（即dst本身）
+    """
+    _resize_binarize(src, dst)
+    return dst
@@ -3,15 +3,240 @@
 处理多张图像的水印去除功能
 """
 import os
+import mmap
 import cv2
 import numpy as np
 import time
 from typing import List, Tuple, Dict, Any, Optional
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from PIL import Image
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+from .watermark_remover import WatermarkRemover, _inpaint_in_rect, _inpaint_poisson, _inpaint_downscaled
+
+# 每个工作进程内按图像尺寸缓存缩放后的二值掩码及其包围盒，同尺寸图像只需计算一次
+_mask_cache: Dict[Tuple[int, int], Tuple[np.ndarray, Tuple[int, int, int, int]]] = {}
+_mask_cache_owner: Optional[str] = None  # 缓存对应的共享内存块，换批次后失效
+_mask_cache_lock = threading.Lock()
+_template_mask: Optional[np.ndarray] = None  # 当前批次解包后的模板掩码，每个进程只解包一次
+
+# 掩码像素少于此数量时修复结果与原图无异，直接跳过修复
+_MIN_MASK_PIXELS = 4
+
+# 以独占方式创建输出文件（Windows下需要二进制模式）
+_EXCLUSIVE_CREATE_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+# 输出文件名冲突时最多尝试的后缀数量
+_MAX_NAME_ATTEMPTS = 1000
+
+# 写入线程数量（编码与写盘会释放GIL，线程即可满足）
+_WRITER_THREADS = 2
+
+
+def _worker_init() -> None:
+    """工作进程初始化：进程间已经并行，限制OpenCV在单个进程内只用一个线程，避免线程过量竞争"""
+    cv2.setNumThreads(1)
+
+
+def _attach_shared_mask(shm_name: str) -> shared_memory.SharedMemory:
+    """在工作进程中挂接模板掩码所在的共享内存块
+
+    Args:
+        shm_name: 共享内存块名称
+
+    Returns:
+        shared_memory.SharedMemory: 共享内存对象
+    """
+    try:
+        # Python 3.13+ 可关闭资源跟踪，避免子进程退出时误删父进程的共享内存
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=shm_name)
+
+
+def _load_template_mask(shm_name: str, shape: Tuple[int, int]) -> np.ndarray:
+    """从共享内存读取按位打包的模板掩码并解包为0/255掩码
+
+    Args:
+        shm_name: 模板掩码所在共享内存块名称
+        shape: 模板掩码形状
+
+    Returns:
+        np.ndarray: 二值模板掩码
+    """
+    pixel_count = shape[0] * shape[1]
+    shm = _attach_shared_mask(shm_name)
+    try:
+        # 共享内存块可能按页对齐而大于实际数据，只取打包数据的长度
+        packed = np.ndarray(((pixel_count + 7) // 8,), dtype=np.uint8, buffer=shm.buf)
+        bits = np.unpackbits(packed, count=pixel_count)
+        # 释放对共享内存的引用后才能关闭
+        del packed
+    finally:
+        shm.close()
+    return (bits * np.uint8(255)).reshape(shape)
+
+
+def _get_resized_mask(shm_name: str,
+                      shape: Tuple[int, int],
+                      h: int,
+                      w: int) -> Tuple[np.ndarray, Tuple[int, int, int, int]]:
+    """获取缩放到指定尺寸的二值掩码及其包围盒，命中缓存时不再访问共享内存
+
+    Args:
+        shm_name: 模板掩码所在共享内存块名称
+        shape: 模板掩码形状
+        h: 目标高度
+        w: 目标宽度
+
+    Returns:
+        Tuple[np.ndarray, Tuple[int, int, int, int]]: 缩放后的二值掩码（只读共享，
+        调用方不得修改）及其非零区域包围盒(x, y, w, h)
+    """
+    global _mask_cache_owner, _template_mask
+    
+    key = (h, w)
+    with _mask_cache_lock:
+        if _mask_cache_owner != shm_name:
+            _mask_cache.clear()
+            _template_mask = _load_template_mask(shm_name, shape)
+            _mask_cache_owner = shm_name
+        cached = _mask_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # 模板已二值化，最近邻缩放的结果仍是0/255，无需再次阈值化
+        mask = cv2.resize(_template_mask, (w, h), interpolation=cv2.INTER_NEAREST)
+        
+        # 掩码几乎为空（如水印区域在缩放后消失）时记为空包围盒，修复时直接跳过
+        if cv2.countNonZero(mask) < _MIN_MASK_PIXELS:
+            rect = (0, 0, 0, 0)
+        else:
+            rect = cv2.boundingRect(mask)
+        cached = (mask, rect)
+        _mask_cache[key] = cached
+        return cached
+
+
+def _read_image(image_path: str) -> Optional[np.ndarray]:
+    """读取图像（在加载线程中运行）
+
+    Args:
+        image_path: 图像文件路径
+
+    Returns:
+        Optional[np.ndarray]: BGR图像，读取失败时返回None
+    """
+    # 读取图像 - 内存映射文件后直接解码，支持中文路径且直接得到BGR图像，
+    # 文件内容由操作系统按页调入，不再额外占用一份堆内存
+    try:
+        with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+            # imdecode已复制出解码结果，释放对映射的引用后才能关闭
+            del buffer
+    except Exception as e:
+        print(f"无法读取图像(详细错误): {image_path}, 错误: {e}")
+        return None
+        
+    if image is None:
+        print(f"无法读取图像: {image_path}")
+    return image
+
+
+def _inpaint_image(image: np.ndarray,
+                   shm_name: str,
+                   shape: Tuple[int, int],
+                   inpaint_radius: int,
+                   algorithm: int,
+                   advanced_method: str,
+                   fast_scale: float = 1.0) -> np.ndarray:
+    """对单个图像去除水印（在工作进程中运行，参数均可序列化）
+
+    Args:
+        image: BGR图像
+        shm_name: 模板掩码所在共享内存块名称
+        shape: 模板掩码形状
+        inpaint_radius: 修复半径
+        algorithm: OpenCV修复算法
+        advanced_method: 高级修复方法
+        fast_scale: 快速模式的缩放比例，小于1时先缩小修复再放大
+
+    Returns:
+        np.ndarray: 去除水印后的图像
+    """
+    # 调整掩码大小以匹配图像
+    h, w = image.shape[:2]
+    mask_binary, rect = _get_resized_mask(shm_name, shape, h, w)
+    
+    # 掩码为空时原图即为结果，不启动修复
+    if rect[2] == 0 or rect[3] == 0:
+        return image
+    
+    # 应用水印去除算法（image是传入进程的副本，可以原地修改）
+    if advanced_method == "poisson":
+        return _inpaint_poisson(image, mask_binary, rect, inpaint_radius, algorithm)
+    if fast_scale < 1.0:
+        return _inpaint_downscaled(image, mask_binary, rect, inpaint_radius, algorithm, fast_scale)
+    return _inpaint_in_rect(image, mask_binary, rect, inpaint_radius, algorithm)
+
+
+def _write_result(image_path: str, result: np.ndarray, output_dir: str) -> bool:
+    """保存处理结果（在写入线程中运行）
+
+    Args:
+        image_path: 原图像文件路径
+        result: 去除水印后的图像
+        output_dir: 输出目录
+
+    Returns:
+        bool: 保存是否成功
+    """
+    base_name = os.path.basename(image_path)
+    name, ext = os.path.splitext(base_name)
+    
+    # 保存结果 - 先编码再写入文件，支持中文路径
+    output_path = os.path.join(output_dir, f"{name}_无水印{ext}")
+    try:
+        if ext.lower() in ['.jpg', '.jpeg']:
+            params = [cv2.IMWRITE_JPEG_QUALITY, 95]
+        elif ext.lower() == '.png':
+            params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        else:
+            params = []
+            
+        success, encoded = cv2.imencode(ext, result, params)
+        if not success:
+            print(f"编码图像失败: {output_path}")
+            return False
+        
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # 以独占方式创建输出文件，文件已存在时添加后缀重试；
+        # 多个写入线程同时处理同名图像时也不会互相覆盖
+        fd = None
+        for counter in range(_MAX_NAME_ATTEMPTS):
+            if counter:
+                output_path = os.path.join(output_dir, f"{name}_无水印_{counter}{ext}")
+            try:
+                fd = os.open(output_path, _EXCLUSIVE_CREATE_FLAGS, 0o666)
+                break
+            except FileExistsError:
+                continue
+        if fd is None:
+            print(f"无法生成可用的输出文件名: {base_name}")
+            return False
+        
+        with os.fdopen(fd, 'wb') as f:
+            f.write(encoded.tobytes())
+    except Exception as e:
+        print(f"保存图像时出错: {output_path}, 错误: {e}")
+        return False
+    
+    return True
 
-from .watermark_remover import WatermarkRemover
 
 class BatchWatermarkProcessor:
     """批量水印处理类，用于处理多张图像的水印去除"""
@@ -23,6 +248,7 @@ class BatchWatermarkProcessor:
         self.inpaint_radius = 3  # 修复半径
         self.algorithm = cv2.INPAINT_TELEA  # 默认算法
         self.advanced_method = "none"  # 高级方法，默认不使用
+        self.fast_scale = 1.0  # 快速模式缩放比例，1.0表示按原尺寸修复
         
         # 批处理相关
         self.image_paths = []  # 待处理图像路径列表
@@ -30,13 +256,22 @@ class BatchWatermarkProcessor:
         self.processed_count = 0  # 已处理数量
         self.success_count = 0  # 成功处理数量
         self.failed_paths = []  # 处理失败的文件路径
+        self._result_lock = threading.Lock()  # 保护处理结果的锁（多个写入线程同时更新）
         
         # 状态标志
         self.is_processing = False  # 是否正在处理
         self.should_stop = False  # 是否应该停止处理
         
-        # 线程池大小
-        self.max_workers = max(1, min(os.cpu_count() or 2, 4))  # 最多使用4个线程
+        # 进程池大小（多进程不受GIL限制，按CPU核数扩展）
+        self.max_workers = max(1, os.cpu_count() or 2)
+        
+        # 修复进程池在首次批量处理时创建，之后各批次复用，避免反复启动进程
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # 写入线程池，编码与写盘不占用修复进程
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=_WRITER_THREADS, thread_name_prefix="watermark-writer"
+        )
     
     def set_template(self, image_path: str) -> bool:
         """设置模板图像
@@ -49,6 +284,14 @@ class BatchWatermarkProcessor:
         """
         return self.template_watermark_remover.load_image(image_path)
     
+    def set_template_image(self, image: np.ndarray) -> None:
+        """把已读取的图像设为模板图像
+        
+        Args:
+            image: WatermarkRemover.read_image返回的图像
+        """
+        self.template_watermark_remover.set_image(image)
+    
     def get_template_remover(self) -> WatermarkRemover:
         """获取模板水印去除器
         
@@ -83,6 +326,14 @@ class BatchWatermarkProcessor:
         self.template_watermark_remover.set_algorithm(algorithm)
         self.template_watermark_remover.set_advanced_method(advanced_method)
     
+    def set_fast_scale(self, scale: float) -> None:
+        """设置快速模式的缩放比例
+        
+        Args:
+            scale: 缩放比例，小于1时先缩小修复再放大（如0.5约快4倍），1.0表示关闭
+        """
+        self.fast_scale = max(0.1, min(1.0, float(scale)))
+    
     def set_batch_images(self, image_paths: List[str]) -> None:
         """设置批量处理的图像路径列表
         
@@ -194,9 +445,93 @@ class BatchWatermarkProcessor:
         """停止批量处理"""
         self.should_stop = True
     
+    def _record_result(self, image_path: str, success: bool, total_count: int, progress_callback) -> None:
+        """记录单个图像的处理结果并更新进度（多个线程调用）
+        
+        Args:
+            image_path: 图像文件路径
+            success: 是否处理成功
+            total_count: 总数量
+            progress_callback: 进度回调函数
+        """
+        with self._result_lock:
+            if success:
+                self.success_count += 1
+            else:
+                self.failed_paths.append(image_path)
+            
+            # 更新进度
+            self.processed_count += 1
+            if progress_callback:
+                progress_callback(self.processed_count, total_count)
+    
+    def _load_worker(self, path_q: queue.Queue, load_q: queue.Queue) -> None:
+        """加载线程：读取图像并放入加载队列
+        
+        Args:
+            path_q: 待读取的路径队列
+            load_q: 已读取图像队列
+        """
+        try:
+            while not self.should_stop:
+                try:
+                    image_path = path_q.get_nowait()
+                except queue.Empty:
+                    break
+                load_q.put((image_path, _read_image(image_path)))
+        finally:
+            # 每个加载线程结束时放入一个结束标记
+            load_q.put(None)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """获取修复进程池（首次使用时创建）
+        
+        Returns:
+            ProcessPoolExecutor: 进程池
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_worker_init)
+        return self._pool
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池（如工作进程意外退出），下次获取时重新创建
+        
+        Args:
+            pool: 已损坏的进程池，已被替换为新进程池时不做处理
+        """
+        if self._pool is pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def close(self) -> None:
+        """关闭进程池和写入线程池，释放后台进程"""
+        self.should_stop = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._write_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _write_and_record(self, image_path: str, result: np.ndarray, total_count: int, progress_callback) -> None:
+        """编码并保存处理结果，然后记录结果（在写入线程池中运行）
+        
+        Args:
+            image_path: 图像文件路径
+            result: 去除水印后的图像
+            total_count: 总数量
+            progress_callback: 进度回调函数
+        """
+        self._record_result(
+            image_path, _write_result(image_path, result, self.output_dir),
+            total_count, progress_callback
+        )
+    
     def _batch_process_thread(self, progress_callback, complete_callback, error_callback):
         """批量处理线程函数
         
+        读取、修复、写入三个阶段通过有界队列衔接：加载线程读取图像，
+        进程池执行修复，写入线程保存结果，磁盘I/O与计算相互重叠，
+        同时内存中最多只保留约2*max_workers张图像。
+        
         Args:
             progress_callback: 进度回调函数
             complete_callback: 完成回调函数
@@ -205,41 +540,18 @@ class BatchWatermarkProcessor:
         try:
             total_count = len(self.image_paths)
             
-            # 获取模板掩码
+            # 二值化模板掩码并按位打包（体积为原来的1/8），一次性放入共享内存，
+            # 避免每个任务重复序列化
             template_mask = self.template_watermark_remover.mask
-            
-            # 使用线程池并行处理图像
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # 提交所有任务
-                future_to_path = {
-                    executor.submit(
-                        self._process_single_image, 
-                        image_path, 
-                        template_mask
-                    ): image_path for image_path in self.image_paths
-                }
+            packed = np.packbits(template_mask > 127)
+            shm = shared_memory.SharedMemory(create=True, size=packed.nbytes)
+            try:
+                shm.buf[:packed.nbytes] = packed.tobytes()
                 
-                # 处理结果
-                for future in as_completed(future_to_path):
-                    if self.should_stop:
-                        break
-                        
-                    image_path = future_to_path[future]
-                    
-                    try:
-                        result = future.result()
-                        if result:
-                            self.success_count += 1
-                        else:
-                            self.failed_paths.append(image_path)
-                    except Exception as e:
-                        print(f"处理图像 {image_path} 时出错: {e}")
-                        self.failed_paths.append(image_path)
-                    
-                    # 更新进度
-                    self.processed_count += 1
-                    if progress_callback:
-                        progress_callback(self.processed_count, total_count)
+                self._run_pipeline(shm.name, template_mask.shape[:2], total_count, progress_callback)
+            finally:
+                shm.close()
+                shm.unlink()
             
             # 完成处理
             self.is_processing = False
@@ -254,85 +566,122 @@ class BatchWatermarkProcessor:
             if error_callback:
                 error_callback(f"批量处理过程中出错: {e}")
     
-    def _process_single_image(self, image_path: str, template_mask: np.ndarray) -> bool:
-        """处理单个图像
+    def _run_pipeline(self, shm_name: str, mask_shape: Tuple[int, int], total_count: int, progress_callback) -> None:
+        """运行读取-修复-写入流水线，直到全部完成或被停止
         
         Args:
-            image_path: 图像文件路径
-            template_mask: 模板掩码
-            
-        Returns:
-            bool: 处理是否成功
+            shm_name: 模板掩码所在共享内存块名称
+            mask_shape: 模板掩码形状
+            total_count: 总数量
+            progress_callback: 进度回调函数
         """
-        try:
-            # 读取图像 - 改进中文路径支持
-            try:
-                # 尝试直接读取
-                image = cv2.imread(image_path)
+        queue_size = 2 * self.max_workers
+        path_q = queue.Queue()
+        for image_path in self.image_paths:
+            path_q.put(image_path)
+        load_q = queue.Queue(maxsize=queue_size)
+        
+        loader_count = max(1, self.max_workers // 2)
+        loaders = [
+            threading.Thread(target=self._load_worker, args=(path_q, load_q), daemon=True)
+            for _ in range(loader_count)
+        ]
+        for thread in loaders:
+            thread.start()
+        
+        # 等待写入的结果，数量受队列大小限制
+        writes = set()
+        
+        def collect(done):
+            """把已完成的修复结果交给写入线程池编码并保存"""
+            for future in done:
+                image_path, pool = pending.pop(future)
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    print(f"处理图像 {image_path} 时出错: {e}")
+                    self._record_result(image_path, False, total_count, progress_callback)
+                    # 之后的任务提交到重新创建的进程池
+                    self._discard_pool(pool)
+                    continue
+                except Exception as e:
+                    print(f"处理图像 {image_path} 时出错: {e}")
+                    self._record_result(image_path, False, total_count, progress_callback)
+                    continue
                 
-                # 如果读取失败，尝试使用numpy+PIL方式读取
+                if len(writes) >= queue_size:
+                    finished, _ = wait(writes, return_when=FIRST_COMPLETED)
+                    writes.difference_update(finished)
+                writes.add(self._write_executor.submit(
+                    self._write_and_record, image_path, result, total_count, progress_callback
+                ))
+        
+        # 使用进程池并行修复图像，同时在途的任务数受队列大小限制
+        # （pending: 任务 -> (图像路径, 提交到的进程池)）
+        pending = {}
+        try:
+            finished_loaders = 0
+            while finished_loaders < loader_count:
+                item = load_q.get()
+                if item is None:
+                    finished_loaders += 1
+                    continue
+                if self.should_stop:
+                    # 继续取出队列中的图像，让加载线程能够退出
+                    continue
+                    
+                image_path, image = item
                 if image is None:
-                    pil_image = Image.open(image_path)
-                    image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            except Exception as e:
-                print(f"无法读取图像(详细错误): {image_path}, 错误: {e}")
-                return False
+                    self._record_result(image_path, False, total_count, progress_callback)
+                    continue
                 
-            if image is None:
-                print(f"无法读取图像: {image_path}")
-                return False
-                
-            # 调整掩码大小以匹配图像
-            h, w = image.shape[:2]
-            mask_resized = cv2.resize(template_mask, (w, h), interpolation=cv2.INTER_NEAREST)
-            
-            # 二值化掩码
-            _, mask_binary = cv2.threshold(mask_resized, 127, 255, cv2.THRESH_BINARY)
-            
-            # 应用水印去除算法
-            result = cv2.inpaint(image, mask_binary, self.inpaint_radius, self.algorithm)
-            
-            # 生成输出文件名
-            base_name = os.path.basename(image_path)
-            name, ext = os.path.splitext(base_name)
-            output_name = f"{name}_无水印{ext}"
-            output_path = os.path.join(self.output_dir, output_name)
-            
-            # 如果文件已存在，添加后缀
-            counter = 1
-            while os.path.exists(output_path):
-                output_name = f"{name}_无水印_{counter}{ext}"
-                output_path = os.path.join(self.output_dir, output_name)
-                counter += 1
-            
-            # 保存结果 - 改进中文路径支持
-            try:
-                # 确保输出目录存在
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                
-                # 保存图像
-                if ext.lower() in ['.jpg', '.jpeg']:
-                    params = [cv2.IMWRITE_JPEG_QUALITY, 95]
-                elif ext.lower() == '.png':
-                    params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
-                else:
-                    params = []
+                if len(pending) >= queue_size:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
                     
-                success = cv2.imwrite(output_path, result, params)
-                
-                # 如果OpenCV保存失败，尝试使用PIL保存
-                if not success:
-                    pil_result = Image.fromarray(cv2.cvtColor(result, cv2.COLOR_BGR2RGB))
-                    pil_result.save(output_path, quality=95 if ext.lower() in ['.jpg', '.jpeg'] else None)
-            except Exception as e:
-                print(f"保存图像时出错: {output_path}, 错误: {e}")
-                return False
-            
-            return True
-        except Exception as e:
-            print(f"处理图像 {image_path} 时出错: {e}")
-            return False
+                # 每次提交时重新获取进程池，进程池损坏后使用新创建的进程池；
+                # 提交时才发现损坏的进程池丢弃后重试一次，仍失败则记为该图像处理失败
+                args = (
+                    _inpaint_image,
+                    image,
+                    shm_name,
+                    mask_shape,
+                    self.inpaint_radius,
+                    self.algorithm,
+                    self.advanced_method,
+                    self.fast_scale
+                )
+                future = None
+                for _ in range(2):
+                    pool = self._get_pool()
+                    try:
+                        future = pool.submit(*args)
+                        break
+                    except BrokenProcessPool as e:
+                        print(f"处理图像 {image_path} 时出错: {e}")
+                        self._discard_pool(pool)
+                if future is None:
+                    self._record_result(image_path, False, total_count, progress_callback)
+                    continue
+                pending[future] = (image_path, pool)
             
+            if pending:
+                if self.should_stop:
+                    # 停止时不再等待尚未开始的任务
+                    for future in pending:
+                        future.cancel()
+                done, _ = wait(pending)
+                collect(done)
+        finally:
+            # 停止或出错时取消尚未开始的任务，等待正在运行的任务结束后再释放共享内存
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            # 所有结果写入完成后才算批次结束
+            wait(writes)
+    
     def get_progress(self) -> Tuple[int, int]:
         """获取当前进度
         
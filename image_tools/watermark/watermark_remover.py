@@ -7,8 +7,356 @@ import cv2
 import numpy as np
 from PIL import Image
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Optional, List, Dict, Any
 
+from . import _mask_kernels
+
+# 掩码预览的半透明红色：dst = 0.5 * src + 0.5 * (0, 0, 255)，BGR顺序
+_MASK_TINT_ALPHA = 0.5
+_MASK_TINT_MATRIX = np.array([
+    [_MASK_TINT_ALPHA, 0, 0, 0],
+    [0, _MASK_TINT_ALPHA, 0, 0],
+    [0, 0, _MASK_TINT_ALPHA, 255 * (1 - _MASK_TINT_ALPHA)],
+], dtype=np.float32)
+
+# 掩码历史最多保留的步数
+_MAX_MASK_HISTORY = 32
+
+# 连续绘制时每隔多少条线保存一次历史
+_STROKES_PER_SNAPSHOT = 5
+
+# 超过此数量的连通区域不再拆分并行修复（逐一检查重叠的开销过大）
+_MAX_PARALLEL_COMPONENTS = 64
+
+# 按连通区域并行修复使用的线程池
+_component_executor: Optional[ThreadPoolExecutor] = None
+
+# 泊松修复：宽高都不小于此值的连通区域使用调和插值，更小的区域仍使用OpenCV修复
+_POISSON_MIN_REGION = 64
+# 泊松修复：金字塔最粗一层的最小边长，以及每层的松弛迭代次数
+_POISSON_MIN_LEVEL = 16
+_POISSON_ITERATIONS = 30
+# 四邻域平均，即离散拉普拉斯方程的Jacobi迭代核
+_POISSON_KERNEL = np.array([[0, 0.25, 0], [0.25, 0, 0.25], [0, 0.25, 0]], dtype=np.float32)
+
+
+def _padded_rect(rect: Tuple[int, int, int, int],
+                 pad: int,
+                 img_w: int,
+                 img_h: int) -> Tuple[int, int, int, int]:
+    """将包围盒向四周外扩并裁剪到图像范围内
+
+    Args:
+        rect: 包围盒(x, y, w, h)
+        pad: 外扩像素数
+        img_w: 图像宽度
+        img_h: 图像高度
+
+    Returns:
+        Tuple[int, int, int, int]: 外扩后的区域(x0, y0, x1, y1)
+    """
+    x, y, w, h = rect
+    return (max(x - pad, 0), max(y - pad, 0),
+            min(x + w + pad, img_w), min(y + h + pad, img_h))
+
+
+def _inpaint_in_rect(image: np.ndarray,
+                     mask: np.ndarray,
+                     rect: Tuple[int, int, int, int],
+                     inpaint_radius: int,
+                     algorithm: int) -> np.ndarray:
+    """只在掩码包围盒内执行修复，结果原地写回image
+
+    修复耗时与参与计算的图像面积成正比，小水印只需处理包围盒
+    外扩修复半径后的区域，结果与整图修复一致。
+
+    Args:
+        image: BGR图像，会被原地修改
+        mask: 与image同尺寸的二值掩码
+        rect: 掩码非零区域的包围盒(x, y, w, h)，即cv2.boundingRect的结果
+        inpaint_radius: 修复半径
+        algorithm: OpenCV修复算法
+
+    Returns:
+        np.ndarray: 修复后的图像（即image本身）
+    """
+    if rect[2] == 0 or rect[3] == 0:
+        return image
+        
+    # 外扩修复半径，保证包围盒边缘的像素能取到完整的邻域
+    img_h, img_w = mask.shape[:2]
+    x0, y0, x1, y1 = _padded_rect(rect, inpaint_radius + 1, img_w, img_h)
+    
+    image[y0:y1, x0:x1] = cv2.inpaint(
+        image[y0:y1, x0:x1], mask[y0:y1, x0:x1], inpaint_radius, algorithm
+    )
+    return image
+
+
+def _inpaint_downscaled(image: np.ndarray,
+                        mask: np.ndarray,
+                        rect: Tuple[int, int, int, int],
+                        inpaint_radius: int,
+                        algorithm: int,
+                        scale: float) -> np.ndarray:
+    """在缩小的掩码区域上修复后再放大回原尺寸，只替换掩码像素，结果原地写回image
+
+    修复耗时约与面积成正比，缩小到scale倍后约快1/scale²倍；
+    掩码以外的像素保持原样，不受缩放影响。
+
+    Args:
+        image: BGR图像，会被原地修改
+        mask: 与image同尺寸的二值掩码
+        rect: 掩码非零区域的包围盒(x, y, w, h)
+        inpaint_radius: 原尺寸下的修复半径
+        algorithm: OpenCV修复算法
+        scale: 缩放比例，(0, 1)之间
+
+    Returns:
+        np.ndarray: 修复后的图像（即image本身）
+    """
+    if rect[2] == 0 or rect[3] == 0:
+        return image
+        
+    # 外扩的范围按缩小后的修复邻域换算回原尺寸
+    img_h, img_w = mask.shape[:2]
+    small_radius = max(1, int(round(inpaint_radius * scale)))
+    pad = int(np.ceil((small_radius + 1) / scale))
+    x0, y0, x1, y1 = _padded_rect(rect, pad, img_w, img_h)
+    roi = image[y0:y1, x0:x1]
+    mask_roi = mask[y0:y1, x0:x1]
+    
+    small_size = (max(1, int(round((x1 - x0) * scale))), max(1, int(round((y1 - y0) * scale))))
+    small = cv2.resize(roi, small_size, interpolation=cv2.INTER_AREA)
+    # 掩码用面积插值后只要有覆盖就保留，避免细笔画在缩小时丢失
+    small_mask = cv2.resize(mask_roi, small_size, interpolation=cv2.INTER_AREA)
+    cv2.threshold(small_mask, 0, 255, cv2.THRESH_BINARY, dst=small_mask)
+    
+    inpainted = cv2.inpaint(small, small_mask, small_radius, algorithm)
+    restored = cv2.resize(inpainted, (x1 - x0, y1 - y0), interpolation=cv2.INTER_LANCZOS4)
+    
+    # 只把掩码像素替换为修复结果
+    cv2.copyTo(restored, mask_roi, roi)
+    return image
+
+
+def _get_component_executor() -> ThreadPoolExecutor:
+    """获取按连通区域并行修复所用的线程池（首次使用时创建）
+
+    Returns:
+        ThreadPoolExecutor: 线程池
+    """
+    global _component_executor
+    
+    if _component_executor is None:
+        _component_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 2,
+            thread_name_prefix="watermark-inpaint"
+        )
+    return _component_executor
+
+
+def _merge_overlapping_boxes(boxes: np.ndarray) -> np.ndarray:
+    """反复合并互相重叠的区域，直到所有区域两两不重叠
+
+    Args:
+        boxes: 形状为(N, 4)的区域数组，每行为(x0, y0, x1, y1)
+
+    Returns:
+        np.ndarray: 两两不重叠的区域数组，每个区域覆盖与之重叠的所有原区域
+    """
+    while len(boxes) > 1:
+        x0, y0, x1, y1 = boxes.T
+        overlap = ((x0[:, None] < x1[None, :]) & (x0[None, :] < x1[:, None]) &
+                   (y0[:, None] < y1[None, :]) & (y0[None, :] < y1[:, None]))
+        np.fill_diagonal(overlap, False)
+        if not overlap.any():
+            break
+            
+        # 按重叠关系分组（并查集）
+        parent = list(range(len(boxes)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+            
+        for i, j in zip(*np.nonzero(np.triu(overlap))):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[root_j] = root_i
+                
+        # 每组合并为一个包围盒；合并后的区域可能与其他区域重叠，继续下一轮
+        roots = np.array([find(i) for i in range(len(boxes))])
+        boxes = np.array([
+            (group[:, 0].min(), group[:, 1].min(), group[:, 2].max(), group[:, 3].max())
+            for group in (boxes[roots == root] for root in np.unique(roots))
+        ])
+    return boxes
+
+
+def _inpaint_components(image: np.ndarray,
+                        mask: np.ndarray,
+                        rect: Tuple[int, int, int, int],
+                        inpaint_radius: int,
+                        algorithm: int) -> np.ndarray:
+    """按掩码连通区域拆分并行修复，结果原地写回image
+
+    cv2.inpaint单次调用不会利用多核。各连通区域外扩后的区域互不重叠时，
+    分别修复的结果与整体修复完全一致，可以在多个线程中同时执行
+    （修复过程会释放GIL）；互相重叠的区域合并后作为一个整体修复，
+    合并后只剩一个区域或区域数量过多时退回到整体修复。
+
+    Args:
+        image: BGR图像，会被原地修改
+        mask: 与image同尺寸的二值掩码
+        rect: 掩码非零区域的包围盒(x, y, w, h)
+        inpaint_radius: 修复半径
+        algorithm: OpenCV修复算法
+
+    Returns:
+        np.ndarray: 修复后的图像（即image本身）
+    """
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    
+    # 标签0为背景
+    component_count = count - 1
+    if component_count < 2 or component_count > _MAX_PARALLEL_COMPONENTS:
+        return _inpaint_in_rect(image, mask, rect, inpaint_radius, algorithm)
+        
+    img_h, img_w = mask.shape[:2]
+    boxes = np.array([
+        _padded_rect(tuple(stats[label, :4]), inpaint_radius + 1, img_w, img_h)
+        for label in range(1, count)
+    ])
+    
+    # 外扩区域重叠时分别修复会互相影响，先把重叠的区域合并
+    boxes = _merge_overlapping_boxes(boxes)
+    if len(boxes) < 2:
+        return _inpaint_in_rect(image, mask, rect, inpaint_radius, algorithm)
+        
+    def inpaint_box(box):
+        """修复单个区域并写回（各区域互不重叠，可并发写入）"""
+        bx0, by0, bx1, by1 = box
+        image[by0:by1, bx0:bx1] = cv2.inpaint(
+            image[by0:by1, bx0:bx1], mask[by0:by1, bx0:bx1], inpaint_radius, algorithm
+        )
+        
+    # 通过list()等待全部完成并抛出其中的异常
+    list(_get_component_executor().map(inpaint_box, boxes.tolist()))
+    return image
+
+
+def _harmonic_fill(image: np.ndarray, hole: np.ndarray) -> np.ndarray:
+    """以调和插值（拉普拉斯方程，边界为已知像素）填充掩码区域
+
+    采用由粗到细的金字塔求解：先在缩小一半的图像上递归求解作为初值，
+    再在本层做少量Jacobi迭代，总耗时与像素数近似成线性关系，
+    大面积掩码也只需几十次迭代即可收敛。
+
+    Args:
+        image: 三通道图像（任意数值类型）
+        hole: 与image同尺寸的布尔数组，True表示待填充像素
+
+    Returns:
+        np.ndarray: 填充后的float32图像
+    """
+    filled = image.astype(np.float32)
+    known = ~hole
+    hole_3ch = hole[:, :, None]
+    h, w = hole.shape
+    
+    if min(h, w) >= 2 * _POISSON_MIN_LEVEL:
+        # 只用已知像素加权缩小，得到下一层的图像与掩码
+        small_size = ((w + 1) // 2, (h + 1) // 2)
+        weight = known.astype(np.float32)
+        small_weight = cv2.resize(weight, small_size, interpolation=cv2.INTER_AREA)
+        small_image = cv2.resize(filled * weight[:, :, None], small_size, interpolation=cv2.INTER_AREA)
+        small_known = small_weight > 0
+        small_image[small_known] /= small_weight[small_known][:, None]
+        
+        # 粗层的解放大后作为本层初值
+        coarse = _harmonic_fill(small_image, ~small_known)
+        initial = cv2.resize(coarse, (w, h), interpolation=cv2.INTER_LINEAR)
+        np.copyto(filled, initial, where=hole_3ch)
+    elif known.any():
+        filled[hole] = filled[known].mean(axis=0)
+        
+    # Jacobi迭代：掩码内像素反复取四邻域平均，已知像素保持不变
+    for _ in range(_POISSON_ITERATIONS):
+        smoothed = cv2.filter2D(filled, -1, _POISSON_KERNEL, borderType=cv2.BORDER_REPLICATE)
+        np.copyto(filled, smoothed, where=hole_3ch)
+    return filled
+
+
+def _inpaint_poisson(image: np.ndarray,
+                     mask: np.ndarray,
+                     rect: Tuple[int, int, int, int],
+                     inpaint_radius: int,
+                     algorithm: int) -> np.ndarray:
+    """大面积掩码区域使用调和插值填充，其余区域使用OpenCV修复，结果原地写回image
+
+    OpenCV的修复算法耗时随掩码面积快速增长，大块水印改用金字塔求解的
+    调和插值；细小的笔画仍交给OpenCV修复，保留其对边缘的处理效果。
+
+    Args:
+        image: BGR图像，会被原地修改
+        mask: 与image同尺寸的二值掩码
+        rect: 掩码非零区域的包围盒(x, y, w, h)
+        inpaint_radius: 修复半径
+        algorithm: OpenCV修复算法
+
+    Returns:
+        np.ndarray: 修复后的图像（即image本身）
+    """
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    
+    # 标签0为背景，找出宽高都足够大的连通区域
+    large = np.flatnonzero(
+        (stats[1:, cv2.CC_STAT_WIDTH] >= _POISSON_MIN_REGION) &
+        (stats[1:, cv2.CC_STAT_HEIGHT] >= _POISSON_MIN_REGION)
+    ) + 1
+    if large.size == 0:
+        return _inpaint_in_rect(image, mask, rect, inpaint_radius, algorithm)
+        
+    large_mask = np.isin(labels, large)
+    
+    # 在大区域的包围盒（外扩1像素以包含边界上的已知像素）内做调和插值；
+    # 包围盒内的小区域也作为未知像素，避免水印颜色作为边界值渗入填充结果
+    img_h, img_w = mask.shape[:2]
+    large_rect = cv2.boundingRect(large_mask.astype(np.uint8))
+    x0, y0, x1, y1 = _padded_rect(large_rect, 1, img_w, img_h)
+    roi = image[y0:y1, x0:x1]
+    hole = mask[y0:y1, x0:x1] > 0
+    filled = _harmonic_fill(roi, hole)
+    
+    # 只写回大区域，小区域留给下面的OpenCV修复
+    large_roi = large_mask[y0:y1, x0:x1]
+    np.copyto(roi, np.clip(filled + 0.5, 0, 255).astype(np.uint8), where=large_roi[:, :, None])
+    
+    # 剩余的小区域使用OpenCV修复
+    small_mask = mask.copy()
+    small_mask[large_mask] = 0
+    return _inpaint_in_rect(image, small_mask, cv2.boundingRect(small_mask), inpaint_radius, algorithm)
+
+
+def _tint_masked(roi: np.ndarray, mask_roi: np.ndarray) -> None:
+    """在掩码区域原地叠加半透明红色
+    
+    Args:
+        roi: BGR图像区域，原地修改
+        mask_roi: 与roi尺寸相同的掩码区域
+    """
+    # 一次仿射变换完成与红色的混合
+    blended = cv2.transform(roi, _MASK_TINT_MATRIX)
+    
+    # 只在掩码区域应用混合效果（按掩码直接复制，不生成布尔索引数组）
+    cv2.copyTo(blended, mask_roi, roi)
+
+
 class WatermarkRemover:
     """水印去除核心类，处理单个图像的水印去除功能"""
     
@@ -19,7 +367,10 @@ class WatermarkRemover:
         self.original_image = None  # 原始图像
         self.mask = None  # 水印掩码
         self.result_image = None  # 处理结果图像
-        self.masked_preview = None  # 带掩码的预览图像
+        self.masked_preview = None  # 带掩码的预览图像（常驻缓冲区，None表示需要重新生成）
+        self.preview_generation = 0  # 预览内容的版本号，图像或掩码每次变化时递增
+        self._mask_scratch = None  # 修复时使用的二值掩码缓冲区
+        self._mask_nonempty = False  # 掩码是否有标记，None表示未知，需要时再扫描
         
         # 处理参数
         self.inpaint_radius = 3  # 修复半径
@@ -33,54 +384,115 @@ class WatermarkRemover:
         self.display_width = 0  # 显示宽度
         self.display_height = 0  # 显示高度
         self.scale_factor = 1.0  # 缩放因子
+        self.display_image = None  # 按显示尺寸缩小的图像，只用于交互预览
+        self._display_preview = None  # 显示尺寸的掩码预览（常驻缓冲区，None表示需要重新生成）
+        self._display_source = None  # display_image对应的源图像
+        self._display_xs = None  # 每个显示像素列对应的掩码列索引
+        self._display_ys = None  # 每个显示像素行对应的掩码行索引
         
         # 绘制历史
-        self.mask_history = []  # 掩码历史，用于撤销操作
+        self.mask_history = []  # 掩码历史（按位打包并压缩后的快照），用于撤销操作
         self.history_index = -1  # 历史索引
+        self._strokes_since_snapshot = 0  # 上次保存历史后绘制的线条数
+        self._history_synced = False  # 当前掩码是否与历史索引处的快照一致
         
-    def load_image(self, image_path: str) -> bool:
-        """加载图像文件
+    def reset(self) -> None:
+        """清空图像、掩码、结果和历史，恢复到未加载图像的状态
+        
+        处理参数、显示尺寸和可复用的缓冲区保持不变，清空图像时不需要重新创建去除器
+        """
+        self.image = None
+        self.original_image = None
+        self.mask = None
+        self.result_image = None
+        self.masked_preview = None
+        self.preview_generation += 1
+        self._mask_nonempty = False
+        
+        self.display_image = None
+        self._display_preview = None
+        self._display_source = None
+        self._display_xs = None
+        self._display_ys = None
+        
+        self.mask_history = []
+        self.history_index = -1
+        self._strokes_since_snapshot = 0
+        self._history_synced = False
+        
+    @staticmethod
+    def read_image(image_path: str) -> Optional[np.ndarray]:
+        """读取图像文件，不修改任何去除器状态，可在后台线程中调用
+        
+        读取的图像统一为uint8的三通道BGR数组，cv2.inpaint可以一次处理三个通道，
+        预览混合也直接在uint8上进行，整个流程不经过浮点类型
         
         Args:
             image_path: 图像文件路径
             
         Returns:
-            bool: 加载是否成功
+            图像数组，读取失败时返回None
         """
         if not os.path.exists(image_path):
-            return False
+            return None
             
         try:
-            # 使用OpenCV读取图像
-            self.original_image = cv2.imread(image_path)
+            # 使用OpenCV读取图像（IMREAD_COLOR保证为uint8三通道BGR，16位等格式也会转换）
+            image = cv2.imread(image_path, cv2.IMREAD_COLOR)
             
-            # 如果OpenCV读取失败，尝试使用PIL读取
-            if self.original_image is None:
-                pil_image = Image.open(image_path)
-                self.original_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            # 创建工作副本
-            self.image = self.original_image.copy()
-            
-            # 创建空白掩码
-            h, w = self.original_image.shape[:2]
-            self.mask = np.zeros((h, w), dtype=np.uint8)
-            
-            # 重置结果和预览
-            self.result_image = None
-            self.masked_preview = None
-            
-            # 清空历史
-            self.mask_history = []
-            self.history_index = -1
-            
-            # 保存首次空白掩码到历史
-            self._save_mask_to_history()
-            
-            return True
+            # 如果OpenCV读取失败，尝试使用PIL读取（先统一转换为8位RGB，
+            # 灰度、调色板、带透明通道或16位的图像不能直接按RGB转换）
+            if image is None:
+                with Image.open(image_path) as pil_image:
+                    rgb = np.asarray(pil_image.convert("RGB"))
+                image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+            return image
         except Exception as e:
             print(f"加载图像时出错: {e}")
+            return None
+    
+    def set_image(self, image: np.ndarray) -> None:
+        """把已读取的图像设为当前图像，并重置掩码、结果和历史
+        
+        Args:
+            image: read_image返回的uint8三通道BGR图像
+        """
+        self.original_image = image
+        
+        # 创建工作副本
+        self.image = self.original_image.copy()
+        
+        # 创建空白掩码
+        h, w = self.original_image.shape[:2]
+        self.mask = np.zeros((h, w), dtype=np.uint8)
+        self._mask_nonempty = False
+        
+        # 重置结果和预览
+        self.result_image = None
+        self.masked_preview = None
+        self.preview_generation += 1
+        
+        # 清空历史
+        self.mask_history = []
+        self.history_index = -1
+        
+        # 保存首次空白掩码到历史
+        self._save_mask_to_history()
+    
+    def load_image(self, image_path: str) -> bool:
+        """加载图像文件
+        
+        Args:
+            image_path: 图像文件路径
+            
+        Returns:
+            bool: 加载是否成功
+        """
+        image = self.read_image(image_path)
+        if image is None:
             return False
+        self.set_image(image)
+        return True
     
     def set_algorithm(self, algorithm_name: str) -> None:
         """设置使用的算法
@@ -127,6 +539,23 @@ class WatermarkRemover:
             img_h, img_w = self.image.shape[:2]
             self.scale_factor = min(width / img_w, height / img_h) * 0.9
     
+    def _display_offset(self) -> Tuple[int, int]:
+        """计算图像在画布上居中显示时的偏移量
+        
+        Returns:
+            Tuple[int, int]: (x偏移, y偏移)
+        """
+        img_height, img_width = self.image.shape[:2]
+        
+        # 计算缩放后的图像尺寸
+        scaled_width = int(img_width * self.scale_factor)
+        scaled_height = int(img_height * self.scale_factor)
+        
+        # 计算图像在画布上的位置（居中）
+        x_offset = max(0, (self.display_width - scaled_width) // 2)
+        y_offset = max(0, (self.display_height - scaled_height) // 2)
+        return x_offset, y_offset
+    
     def canvas_to_image_coords(self, canvas_coords):
         """
         将画布坐标转换为图像坐标
@@ -140,29 +569,33 @@ class WatermarkRemover:
         if self.image is None:
             return canvas_coords
         
-        # 获取画布和图像尺寸
-        canvas_width = self.display_width
-        canvas_height = self.display_height
-        
+        # 转换在编译内核中完成（未安装numba时为等价的纯Python实现）
         img_height, img_width = self.image.shape[:2]
+        return _mask_kernels.canvas_to_image_coords(
+            float(canvas_coords[0]), float(canvas_coords[1]),
+            int(self.display_width), int(self.display_height),
+            img_width, img_height, float(self.scale_factor)
+        )
+    
+    def _canvas_points_to_image(self, canvas_points) -> np.ndarray:
+        """批量将画布坐标转换为图像坐标
         
-        # 计算缩放后的图像尺寸
-        scaled_width = int(img_width * self.scale_factor)
-        scaled_height = int(img_height * self.scale_factor)
-        
-        # 计算图像在画布上的位置（居中）
-        x_offset = max(0, (canvas_width - scaled_width) // 2)
-        y_offset = max(0, (canvas_height - scaled_height) // 2)
-        
-        # 转换坐标
-        img_x = int((canvas_coords[0] - x_offset) / self.scale_factor)
-        img_y = int((canvas_coords[1] - y_offset) / self.scale_factor)
-        
-        # 确保坐标在图像范围内
-        img_x = max(0, min(img_x, img_width - 1))
-        img_y = max(0, min(img_y, img_height - 1))
+        参数:
+            canvas_points (list): 画布坐标点列表
+            
+        返回:
+            numpy.ndarray: 形状为(N, 2)的int32图像坐标数组
+        """
+        img_height, img_width = self.image.shape[:2]
+        x_offset, y_offset = self._display_offset()
         
-        return (img_x, img_y)
+        # 一次完成所有点的平移、缩放和裁剪（使用float64，与单点转换的取整结果一致）
+        pts = np.asarray(canvas_points, dtype=np.float64).reshape(-1, 2)
+        pts -= (x_offset, y_offset)
+        pts /= self.scale_factor
+        img_pts = pts.astype(np.int32)
+        np.clip(img_pts, 0, (img_width - 1, img_height - 1), out=img_pts)
+        return img_pts
     
     def add_mask_region(self, canvas_points, radius=5):
         """
@@ -179,16 +612,22 @@ class WatermarkRemover:
         if self.mask.shape[:2] != self.image.shape[:2]:
             h, w = self.image.shape[:2]
             self.mask = np.zeros((h, w), dtype=np.uint8)
+            self._update_mask_preview()
         
-        # 将画布坐标转换为图像坐标，并在掩码上绘制
-        for point in canvas_points:
-            img_point = self.canvas_to_image_coords(point)
-            # 检查坐标是否有效
-            if 0 <= img_point[0] < self.mask.shape[1] and 0 <= img_point[1] < self.mask.shape[0]:
-                cv2.circle(self.mask, img_point, radius, 255, -1)
+        if len(canvas_points) == 0:
+            return
         
-        # 更新掩码预览
-        self._update_mask_preview()
+        # 将画布坐标批量转换为图像坐标，并在掩码上一次绘制整条笔画
+        img_pts = self._canvas_points_to_image(canvas_points)
+        if len(img_pts) == 1:
+            cv2.circle(self.mask, (int(img_pts[0, 0]), int(img_pts[0, 1])), radius, 255, -1)
+        else:
+            # 粗线段自带圆形端点，效果等同于沿途逐点画圆且不会出现断点
+            cv2.polylines(self.mask, [img_pts], False, 255, thickness=2 * radius, lineType=cv2.LINE_8)
+        self._mask_nonempty = True
+        
+        # 只更新预览中被修改的区域
+        self._update_preview_region(self._stroke_rect(img_pts, radius))
     
     def draw_line_on_mask(self, start_canvas_coords, end_canvas_coords, brush_size):
         """
@@ -198,48 +637,79 @@ class WatermarkRemover:
             start_canvas_coords (tuple): 起始点画布坐标 (x, y)
             end_canvas_coords (tuple): 终点画布坐标 (x, y)
             brush_size (int): 线条宽度
+            
+        返回:
+            tuple: 掩码上被修改的矩形区域 (x0, y0, x1, y1)，没有图像时为None
         """
         if self.image is None or self.mask is None:
-            return
+            return None
         
         # 确保掩码与当前图像尺寸一致
         if self.mask.shape[:2] != self.image.shape[:2]:
             h, w = self.image.shape[:2]
             self.mask = np.zeros((h, w), dtype=np.uint8)
+            self._update_mask_preview()
         
-        # 转换为图像坐标
-        start_img = self.canvas_to_image_coords(start_canvas_coords)
-        end_img = self.canvas_to_image_coords(end_canvas_coords)
+        # 转换为图像坐标（转换结果已裁剪到图像范围内）
+        img_pts = self._canvas_points_to_image((start_canvas_coords, end_canvas_coords))
+        start_img = (int(img_pts[0, 0]), int(img_pts[0, 1]))
+        end_img = (int(img_pts[1, 0]), int(img_pts[1, 1]))
         
-        # 检查坐标是否有效
-        h, w = self.mask.shape[:2]
-        if (0 <= start_img[0] < w and 0 <= start_img[1] < h and
-            0 <= end_img[0] < w and 0 <= end_img[1] < h):
-            
-            # 计算半径
-            radius = max(1, brush_size // 2)
-            
-            # 在掩码上绘制线条
-            cv2.line(self.mask, start_img, end_img, 255, brush_size)
-            
-            # 在起点和终点画圆，确保线条连贯
-            cv2.circle(self.mask, start_img, radius, 255, -1)
-            cv2.circle(self.mask, end_img, radius, 255, -1)
+        # 计算半径
+        radius = max(1, brush_size // 2)
         
-        # 更新掩码预览
-        self._update_mask_preview()
+        # 直接在掩码上绘制线条（光栅化和加粗都在OpenCV内部完成）
+        cv2.line(self.mask, start_img, end_img, 255, thickness=brush_size, lineType=cv2.LINE_8)
+        
+        # 在终点画圆，确保线条连贯（起点已由上一段或start_draw画过）
+        cv2.circle(self.mask, end_img, radius, 255, -1)
+        self._mask_nonempty = True
+        
+        # 只更新预览中被修改的区域
+        rect = self._stroke_rect(img_pts, max(radius, (brush_size + 1) // 2))
+        self._update_preview_region(rect)
         
         # 每绘制5条线保存一次掩码到历史
-        if np.random.random() < 0.2:  # 大约每5次保存一次
+        self._strokes_since_snapshot += 1
+        if self._strokes_since_snapshot >= _STROKES_PER_SNAPSHOT:
+            self._strokes_since_snapshot = 0
             self._save_mask_to_history()
+        
+        return rect
     
-    def clear_mask(self) -> None:
-        """清除掩码并更新显示"""
-        if self.image is not None:
-            h, w = self.image.shape[:2]
-            self.mask = np.zeros((h, w), dtype=np.uint8)
-            # 清除后更新预览，显示原始图像
-            self._update_mask_preview()
+    def _stroke_rect(self, img_pts: np.ndarray, radius: int) -> Tuple[int, int, int, int]:
+        """计算一组点按给定半径绘制后在掩码上影响的矩形区域
+        
+        Args:
+            img_pts: 形状为(N, 2)的图像坐标数组
+            radius: 绘制半径
+            
+        Returns:
+            Tuple[int, int, int, int]: (x0, y0, x1, y1)，右下角不包含，已裁剪到图像范围内
+        """
+        img_height, img_width = self.mask.shape[:2]
+        x0 = max(0, int(img_pts[:, 0].min()) - radius - 1)
+        y0 = max(0, int(img_pts[:, 1].min()) - radius - 1)
+        x1 = min(img_width, int(img_pts[:, 0].max()) + radius + 2)
+        y1 = min(img_height, int(img_pts[:, 1].max()) + radius + 2)
+        return x0, y0, x1, y1
+    
+    def clear_mask(self) -> bool:
+        """清除掩码并更新显示
+        
+        Returns:
+            bool: 掩码是否有变化（本来就没有标记时不做任何处理）
+        """
+        if self.image is None or not self.has_mask():
+            return False
+            
+        h, w = self.image.shape[:2]
+        self.mask = np.zeros((h, w), dtype=np.uint8)
+        self._mask_nonempty = False
+        self._history_synced = False
+        # 清除后更新预览，显示原始图像
+        self._update_mask_preview()
+        return True
             
     def start_draw(self, canvas_point, brush_size):
         """
@@ -248,25 +718,32 @@ class WatermarkRemover:
         参数:
             canvas_point (tuple): 画布坐标 (x, y)
             brush_size (int): 画笔大小
+            
+        返回:
+            tuple: 掩码上被修改的矩形区域 (x0, y0, x1, y1)，没有图像时为None
         """
         if self.image is None or self.mask is None:
-            return
+            return None
             
         # 确保掩码与当前图像尺寸一致
         if self.mask.shape[:2] != self.image.shape[:2]:
             h, w = self.image.shape[:2]
             self.mask = np.zeros((h, w), dtype=np.uint8)
+            self._update_mask_preview()
             
-        # 转换坐标
+        # 转换坐标（转换结果已裁剪到图像范围内）
         img_point = self.canvas_to_image_coords(canvas_point)
         
         # 绘制第一个点
         radius = max(1, brush_size // 2)
-        if 0 <= img_point[0] < self.mask.shape[1] and 0 <= img_point[1] < self.mask.shape[0]:
-            cv2.circle(self.mask, img_point, radius, 255, -1)
+        cv2.circle(self.mask, img_point, radius, 255, -1)
+        self._mask_nonempty = True
             
-        # 更新掩码预览
-        self._update_mask_preview()
+        # 只更新预览中被修改的区域
+        rect = self._stroke_rect(np.array([img_point]), radius)
+        self._update_preview_region(rect)
+        
+        return rect
         
     def update_brush_size(self, size):
         """
@@ -285,70 +762,143 @@ class WatermarkRemover:
         except:
             return False
             
-    def show_brush_preview(self, canvas_coords, brush_size):
-        """
-        获取带有笔刷预览的图像
+    def get_masked_preview(self) -> Optional[np.ndarray]:
+        """获取带有掩码标记的预览图像
         
-        参数:
-            canvas_coords (tuple): 画布坐标 (x, y)
-            brush_size (int): 画笔大小
-            
-        返回:
-            numpy.ndarray: 带有笔刷预览的图像
+        预览保存在常驻缓冲区中，绘制时只更新被修改的区域，
+        只有加载、清除、撤销等整体变化后才重新生成
+        
+        Returns:
+            带有掩码标记的预览图像（内部缓冲区，调用方不应修改）
         """
-        if self.image is None:
+        if self.image is None or self.mask is None:
             return None
             
-        # 获取当前显示的预览图像（带有掩码或处理结果）
-        if self.masked_preview is not None:
-            preview = self.masked_preview.copy()
-        else:
+        if self.masked_preview is None:
+            # 创建带有掩码标记的预览图像
             preview = self.image.copy()
             
-        # 转换坐标
-        img_point = self.canvas_to_image_coords(canvas_coords)
+            # 只处理掩码包围盒内的区域，涂抹区域通常只占整图很小一部分
+            x, y, w, h = cv2.boundingRect(self.mask)
+            if w > 0 and h > 0:
+                _tint_masked(preview[y:y + h, x:x + w], self.mask[y:y + h, x:x + w])
+            self.masked_preview = preview
+        
+        return self.masked_preview
+    
+    def get_masked_preview_region(self, rect: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """获取预览图像中一个矩形区域，用于绘制时的局部刷新
         
-        # 检查坐标是否有效
-        h, w = preview.shape[:2]
-        if 0 <= img_point[0] < w and 0 <= img_point[1] < h:
-            # 在预览图像上绘制圆形笔刷
-            radius = max(1, brush_size // 2)
-            cv2.circle(preview, img_point, radius, (0, 0, 255), 2)
+        Args:
+            rect: 图像坐标中的矩形 (x0, y0, x1, y1)，右下角不包含
             
-        return preview
+        Returns:
+            该区域带有掩码标记的预览图像（内部缓冲区的视图，调用方不应修改）
+        """
+        preview = self.get_masked_preview()
+        if preview is None:
+            return None
+            
+        x0, y0, x1, y1 = rect
+        return preview[y0:y1, x0:x1]
     
-    def get_masked_preview(self) -> Optional[np.ndarray]:
-        """获取带有掩码标记的预览图像
+    def _ensure_display_image(self) -> bool:
+        """按当前缩放因子准备显示尺寸的图像，图像或显示尺寸变化时重新缩放
         
         Returns:
-            带有掩码标记的预览图像
+            bool: 是否有可显示的图像
         """
-        if self.image is None or self.mask is None:
+        if self.image is None:
+            return False
+            
+        img_h, img_w = self.image.shape[:2]
+        disp_w = max(1, int(img_w * self.scale_factor))
+        disp_h = max(1, int(img_h * self.scale_factor))
+        if (self.display_image is None or self._display_source is not self.image
+                or self.display_image.shape[:2] != (disp_h, disp_w)):
+            self.display_image = cv2.resize(self.image, (disp_w, disp_h), interpolation=cv2.INTER_AREA)
+            self._display_source = self.image
+            
+            # 每个显示像素取其中心对应的掩码像素（最近邻），整体合成与局部更新使用同一映射
+            self._display_xs = np.minimum(
+                ((np.arange(disp_w) + 0.5) * (img_w / disp_w)).astype(np.intp), img_w - 1)
+            self._display_ys = np.minimum(
+                ((np.arange(disp_h) + 0.5) * (img_h / disp_h)).astype(np.intp), img_h - 1)
+            self._display_preview = None
+            self.preview_generation += 1
+        return True
+    
+    def get_display_preview(self) -> Optional[np.ndarray]:
+        """获取按显示尺寸合成的掩码预览，供界面直接显示
+        
+        图像只在显示尺寸变化时缩小一次，掩码仍保持原图分辨率用于修复，
+        交互时的合成只在显示分辨率上进行
+        
+        Returns:
+            显示尺寸的预览图像（内部缓冲区，调用方不应修改）
+        """
+        if self.mask is None or not self._ensure_display_image():
             return None
             
-        # 创建带有掩码标记的预览图像
-        preview = self.image.copy()
+        if self._display_preview is None:
+            preview = self.display_image.copy()
+            x, y, w, h = cv2.boundingRect(self.mask)
+            if w > 0 and h > 0:
+                self._tint_display_rect(preview, self.display_rect((x, y, x + w, y + h)))
+            self._display_preview = preview
         
-        # 创建掩码覆盖层（红色）
-        overlay = np.zeros_like(preview)
-        overlay[:,:,2] = 255  # 红色通道
+        return self._display_preview
+    
+    def display_rect(self, rect: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """计算图像坐标矩形在显示预览中影响的矩形
         
-        # 将掩码扩展为3通道
-        mask_3ch = cv2.merge([self.mask, self.mask, self.mask])
+        Args:
+            rect: 图像坐标中的矩形 (x0, y0, x1, y1)，右下角不包含
+            
+        Returns:
+            Tuple[int, int, int, int]: 显示坐标中的矩形 (x0, y0, x1, y1)，右下角不包含
+        """
+        x0, y0, x1, y1 = rect
+        return (int(np.searchsorted(self._display_xs, x0)),
+                int(np.searchsorted(self._display_ys, y0)),
+                int(np.searchsorted(self._display_xs, x1)),
+                int(np.searchsorted(self._display_ys, y1)))
+    
+    def _tint_display_rect(self, preview: np.ndarray, drect: Tuple[int, int, int, int]) -> None:
+        """重新合成显示预览中的一个矩形区域
         
-        # 在掩码区域创建蒙版
-        mask_indices = mask_3ch > 0
+        Args:
+            preview: 显示尺寸的预览缓冲区，原地修改
+            drect: 显示坐标中的矩形 (x0, y0, x1, y1)
+        """
+        dx0, dy0, dx1, dy1 = drect
+        if dx1 <= dx0 or dy1 <= dy0:
+            return
+            
+        roi = preview[dy0:dy1, dx0:dx1]
+        np.copyto(roi, self.display_image[dy0:dy1, dx0:dx1])
+        mask_roi = self.mask[self._display_ys[dy0:dy1, None], self._display_xs[dx0:dx1]]
+        _tint_masked(roi, mask_roi)
+    
+    def _update_preview_region(self, rect: Tuple[int, int, int, int]) -> None:
+        """掩码局部变化后只重新合成预览缓冲区中的对应区域
         
-        # 创建临时图像用于混合
-        temp = preview.copy()
-        # 在掩码区域显示半透明红色
-        alpha = 0.5
-        cv2.addWeighted(overlay, alpha, preview, 1 - alpha, 0, temp)
+        Args:
+            rect: 图像坐标中的矩形 (x0, y0, x1, y1)，右下角不包含
+        """
+        x0, y0, x1, y1 = rect
+        self.preview_generation += 1
+        self._history_synced = False
         
-        # 只在掩码区域应用混合效果
-        np.copyto(preview, temp, where=mask_indices)
+        # 原图分辨率的预览（已生成时）
+        if self.masked_preview is not None:
+            roi = self.masked_preview[y0:y1, x0:x1]
+            np.copyto(roi, self.image[y0:y1, x0:x1])
+            _tint_masked(roi, self.mask[y0:y1, x0:x1])
         
-        return preview
+        # 显示分辨率的预览（已生成时）
+        if self._display_preview is not None and self._display_source is self.image:
+            self._tint_display_rect(self._display_preview, self.display_rect(rect))
     
     def remove_watermark(self) -> bool:
         """执行水印去除操作
@@ -368,22 +918,35 @@ class WatermarkRemover:
             # 准备掩码
             h, w = self.original_image.shape[:2]
             
-            # 确保掩码尺寸正确
-            mask_resized = cv2.resize(self.mask, (w, h), interpolation=cv2.INTER_NEAREST)
+            # 复用预分配的掩码缓冲区，避免每次修复都重新分配
+            if self._mask_scratch is None or self._mask_scratch.shape != (h, w):
+                self._mask_scratch = np.empty((h, w), dtype=np.uint8)
+            mask_binary = self._mask_scratch
             
-            # 二值化掩码
-            _, mask_binary = cv2.threshold(mask_resized, 127, 255, cv2.THRESH_BINARY)
+            # 确保掩码尺寸正确（尺寸一致时跳过缩放）并二值化
+            if self.mask.shape[:2] == (h, w):
+                cv2.threshold(self.mask, 127, 255, cv2.THRESH_BINARY, dst=mask_binary)
+            elif _mask_kernels.NUMBA_AVAILABLE:
+                # 缩放与二值化在一次遍历中完成
+                _mask_kernels.resize_binarize(self.mask, mask_binary)
+            else:
+                cv2.resize(self.mask, (w, h), dst=mask_binary, interpolation=cv2.INTER_NEAREST)
+                cv2.threshold(mask_binary, 127, 255, cv2.THRESH_BINARY, dst=mask_binary)
             
             # 如果没有掩码区域，返回失败
-            if np.max(mask_binary) == 0:
+            rect = cv2.boundingRect(mask_binary)
+            if rect[2] == 0 or rect[3] == 0:
                 self.is_processing = False
                 return False
             
-            # 使用OpenCV内置算法去除水印
-            self.result_image = cv2.inpaint(
-                self.original_image, 
-                mask_binary, 
-                self.inpaint_radius, 
+            # 泊松方法对大块区域使用调和插值；否则使用OpenCV内置算法去除水印
+            # （只处理掩码所在区域，多个独立区域并行处理）
+            inpaint = _inpaint_poisson if self.advanced_method == "poisson" else _inpaint_components
+            self.result_image = inpaint(
+                self.original_image.copy(),
+                mask_binary,
+                rect,
+                self.inpaint_radius,
                 self.algorithm
             )
             
@@ -408,9 +971,8 @@ class WatermarkRemover:
         if not self.advanced_method or self.advanced_method == "none":
             return self.remove_watermark()
             
-        # 这里可以根据需要实现或调用不同的高级水印去除算法
-        # 例如泊松融合、纹理合成等方法
-        # 目前仅作为示例，仍使用基本方法
+        # 泊松方法（"poisson"）已在基本方法中按高级方法设置处理，
+        # 其他方法（如纹理合成）尚未实现，仍使用基本方法
         return self.remove_watermark()
     
     def get_result_image(self) -> Optional[np.ndarray]:
@@ -437,6 +999,7 @@ class WatermarkRemover:
         # 重置掩码
         h, w = self.image.shape[:2]
         self.mask = np.zeros((h, w), dtype=np.uint8)
+        self._mask_nonempty = False
         
         # 清空历史
         self.mask_history = []
@@ -455,8 +1018,13 @@ class WatermarkRemover:
         return True
     
     def _update_mask_preview(self):
-        """更新掩码预览图像"""
-        self.masked_preview = self.get_masked_preview()
+        """标记掩码预览整体过期，在下次需要时再重新生成
+        
+        用于清除、撤销等整体变化；绘制时的局部变化由_update_preview_region处理
+        """
+        self.masked_preview = None
+        self._display_preview = None
+        self.preview_generation += 1
     
     def save_result(self, output_path: str, quality: int = 95) -> bool:
         """保存处理结果
@@ -493,7 +1061,10 @@ class WatermarkRemover:
             return False
     
     def _save_mask_to_history(self):
-        """保存当前掩码到历史记录"""
+        """保存当前掩码到历史记录
+        
+        掩码是二值图像，按位打包后再压缩，每步历史只占整幅掩码的极小一部分
+        """
         if self.mask is None:
             return
             
@@ -501,10 +1072,46 @@ class WatermarkRemover:
         if self.history_index < len(self.mask_history) - 1:
             self.mask_history = self.mask_history[:self.history_index + 1]
             
-        # 复制当前掩码并添加到历史
-        mask_copy = self.mask.copy()
-        self.mask_history.append(mask_copy)
+        # 压缩当前掩码并添加到历史
+        packed = zlib.compress(np.packbits(self.mask > 0).tobytes(), 1)
+        self.mask_history.append((self.mask.shape, packed))
+        
+        # 超出上限时丢弃最早的历史
+        if len(self.mask_history) > _MAX_MASK_HISTORY:
+            del self.mask_history[:len(self.mask_history) - _MAX_MASK_HISTORY]
         self.history_index = len(self.mask_history) - 1
+        self._history_synced = True
+    
+    def _restore_mask_from_history(self) -> None:
+        """从当前历史索引处的快照恢复掩码"""
+        shape, packed = self.mask_history[self.history_index]
+        bits = np.unpackbits(
+            np.frombuffer(zlib.decompress(packed), dtype=np.uint8),
+            count=shape[0] * shape[1]
+        ).reshape(shape)
+        
+        # 尺寸不变时复用现有掩码缓冲区
+        if self.mask is None or self.mask.shape != shape:
+            self.mask = np.empty(shape, dtype=np.uint8)
+        np.multiply(bits, 255, out=self.mask)
+        self._history_synced = True
+        
+        # 快照是否有标记未记录，下次查询时再扫描
+        self._mask_nonempty = None
+    
+    def has_mask(self) -> bool:
+        """判断掩码上是否有标记区域
+        
+        绘制和清除时直接记录结果，只有从历史恢复后才需要扫描一次掩码
+        
+        Returns:
+            bool: 是否有标记
+        """
+        if self.mask is None:
+            return False
+        if self._mask_nonempty is None:
+            self._mask_nonempty = bool(np.any(self.mask))
+        return self._mask_nonempty
     
     def undo_mask(self) -> bool:
         """撤销最后一次掩码编辑
@@ -515,15 +1122,8 @@ class WatermarkRemover:
         if not self.mask_history or self.history_index <= 0:
             return False
             
-        # 减少历史索引
-        self.history_index -= 1
-        
-        # 恢复掩码
-        self.mask = self.mask_history[self.history_index].copy()
-        
-        # 更新预览
-        self._update_mask_preview()
-        
+        # 减少历史索引并恢复掩码
+        self._step_history(-1)
         return True
         
     def redo_mask(self) -> bool:
@@ -535,13 +1135,24 @@ class WatermarkRemover:
         if self.history_index >= len(self.mask_history) - 1:
             return False
             
-        # 增加历史索引
-        self.history_index += 1
-        
-        # 恢复掩码
-        self.mask = self.mask_history[self.history_index].copy()
+        # 增加历史索引并恢复掩码
+        self._step_history(1)
+        return True
+    
+    def _step_history(self, step: int) -> None:
+        """移动历史索引并恢复对应的掩码
         
-        # 更新预览
-        self._update_mask_preview()
+        当前掩码与原快照一致且目标快照内容相同时（例如连续绘制中途保存的快照
+        与松开鼠标时保存的快照相同），掩码和预览都保持不变，不需要重新生成
         
-        return True 
\ No newline at end of file
+        Args:
+            step: 索引移动量，-1为撤销，1为重做
+        """
+        previous = self.mask_history[self.history_index][1]
+        self.history_index += step
+        if self._history_synced and self.mask_history[self.history_index][1] == previous:
+            return
+            
+        # 恢复掩码并更新预览
+        self._restore_mask_from_history()
+        self._update_mask_preview() 
@@ -3,6 +3,7 @@
 提供交互式水印标记和去除功能的图形界面
 """
 import os
+import re
 import sys
 import threading
 import tkinter as tk
@@ -12,10 +13,29 @@ import cv2
 import numpy as np
 from typing import Optional, Tuple, List, Dict, Any
 
+from . import _mask_kernels
 from .watermark_remover import WatermarkRemover
 from .batch_processor import BatchWatermarkProcessor
 from ..utils.config_manager import ConfigManager
 
+# 批量选择文件夹时识别的图像文件名（按扩展名，不区分大小写）
+_IMG_RE = re.compile(r"\.(jpe?g|png|bmp|tiff?|webp)$", re.IGNORECASE)
+
+# 批量处理进度的状态文本
+_PROGRESS_FMT = "正在处理: {}/{} - {}%".format
+
+# 批量处理进度刷新到界面的最小间隔（毫秒），约30次每秒
+_PROGRESS_INTERVAL_MS = 33
+
+# 参数最后一次变化后延迟写入配置文件的时间（毫秒），拖动滑块期间只写一次
+_CONFIG_SAVE_DELAY_MS = 500
+
+# 批量快速模式下修复前的缩放比例（面积缩小到1/4，修复约快4倍）
+_FAST_MODE_SCALE = 0.5
+
+# 按尺寸保留的Tkinter图像数量（预览与处理结果的显示尺寸通常不同，各保留一个）
+_PHOTO_POOL_SIZE = 2
+
 class WatermarkRemoverTab(ttk.Frame):
     """水印去除标签页，包含单张和批量处理功能"""
     
@@ -27,18 +47,40 @@ class WatermarkRemoverTab(ttk.Frame):
         """
         super().__init__(parent)
         
+        # 当前模式与画布尺寸的缓存，避免在鼠标事件中反复查询Tk
+        self._current_tab = 0  # 当前标签页，0为单张模式，1为批量模式
+        self._canvas_w = 1  # 画布宽度，由<Configure>事件更新
+        self._canvas_h = 1  # 画布高度，由<Configure>事件更新
+        self._last_display_size = None  # 上次设置给去除器的显示尺寸
+        
         # 初始化成员变量
         self.watermark_remover = WatermarkRemover()  # 单张水印去除器
-        self.batch_processor = BatchWatermarkProcessor()  # 批量处理器
+        self.batch_processor = None  # 批量处理器（首次切换到批量模式时创建）
         self.config_manager = ConfigManager()  # 配置管理器
+        self._config_dirty = {}  # 尚未写入配置文件的参数
+        self._config_after_id = None  # 延迟写入配置的定时任务ID
         
         # 图像显示相关
         self.tk_image = None  # Tkinter图像对象
+        self._photo_pool = {}  # 按(宽, 高)复用的Tkinter图像，避免反复重建Tk的图像缓冲
+        self._rgb_buffer = None  # 显示预览时转换为RGB的常驻缓冲区
         self.canvas_image = None  # 画布上的图像ID
-        self.brush_preview = None  # 笔刷预览ID
         self.drawing = False  # 是否正在绘制
         self.last_x = 0  # 上一个绘制点x坐标
         self.last_y = 0  # 上一个绘制点y坐标
+        self._pending_redraw = False  # 是否已安排在空闲时刷新预览
+        self._pending_cursor = None  # 最近一次鼠标移动、尚未显示的画笔预览位置 (x, y)
+        self._cursor_scheduled = False  # 是否已安排在空闲时移动画笔预览
+        self._last_pct = -1  # 进度条上次显示的百分比
+        self._pending_progress = None  # 处理线程最新上报、尚未显示的进度 (当前, 总数)
+        self._progress_scheduled = False  # 是否已安排刷新进度
+        self._dirty_rect = None  # 上次刷新后掩码被修改的图像区域 (x0, y0, x1, y1)
+        self._shown_preview_of = None  # 画布当前显示的是哪个去除器的掩码预览
+        self._shown_generation = -1  # 画布上预览对应的预览版本号
+        self._display_canvas_size = None  # 显示图像时的画布尺寸 (宽, 高)
+        self._shown_image = None  # 画布当前显示的由_show_image缩放的图像（如处理结果）
+        self._applied_params = {}  # 已应用到去除器的参数值，滑块拖动中取值未变时不再重复应用
+        self._display_geometry = (None, None)  # (画布宽, 画布高, 图像宽, 图像高) -> (显示宽, 显示高, 预缩小倍数)
         
         # 设置UI
         self._setup_ui()
@@ -72,7 +114,7 @@ class WatermarkRemoverTab(ttk.Frame):
         # 创建批量去水印标签页
         self.batch_mode_frame = ttk.Frame(self.mode_notebook)
         self.mode_notebook.add(self.batch_mode_frame, text="批量去除")
-        self._setup_batch_mode_ui()
+        # 批量模式的控件在首次切换到该标签页时再创建
         
         # 绑定标签页切换事件
         self.mode_notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
@@ -85,12 +127,21 @@ class WatermarkRemoverTab(ttk.Frame):
         self.canvas = tk.Canvas(self.display_frame, bg="#EEEEEE", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
+        # 常驻的图像项，显示新图像时只更新其图像和位置
+        self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, state="hidden", tags="image")
+        
+        # 常驻的画笔预览圆（位于图像项之上），移动鼠标时只更新其坐标
+        self._brush_oval = self.canvas.create_oval(
+            0, 0, 0, 0, outline="red", width=2, state="hidden", tags="brush_preview"
+        )
+        
         # 绑定鼠标事件
         self.canvas.bind("<ButtonPress-1>", self._start_draw)
         self.canvas.bind("<B1-Motion>", self._draw)
         self.canvas.bind("<ButtonRelease-1>", self._stop_draw)
         self.canvas.bind("<Motion>", self._show_brush_preview)
         self.canvas.bind("<Leave>", self._hide_brush_preview)
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
         
         # 状态栏
         self.status_frame = ttk.Frame(self)
@@ -134,9 +185,12 @@ class WatermarkRemoverTab(ttk.Frame):
         self.brush_size_label = ttk.Label(tools_frame, text="10")
         self.brush_size_label.pack(anchor=tk.E, padx=5)
         
-        # 创建水印去除设置区域
-        param_frame = ttk.LabelFrame(self.single_mode_frame, text="去除设置")
-        param_frame.pack(fill=tk.X, padx=5, pady=5)
+        # 创建水印去除设置区域（单张与批量模式共用同一组控件，切换标签页时移动到当前页中；
+        # 父控件为两个标签页的共同祖先，才能在两页之间移动）
+        self._single_param_anchor = tools_frame
+        self.param_frame = ttk.LabelFrame(self.control_frame, text="去除设置")
+        self.param_frame.pack(in_=self.single_mode_frame, fill=tk.X, padx=5, pady=5)
+        param_frame = self.param_frame
         
         # 算法选择
         ttk.Label(param_frame, text="算法选择:").pack(anchor=tk.W, padx=5, pady=2)
@@ -164,6 +218,15 @@ class WatermarkRemoverTab(ttk.Frame):
         )
         radius_scale.pack(fill=tk.X, padx=5, pady=5)
         
+        # 高级修复方法
+        self.advanced_method_var = tk.StringVar(value="none")
+        ttk.Checkbutton(
+            param_frame, text="大面积区域使用泊松填充",
+            variable=self.advanced_method_var,
+            onvalue="poisson", offvalue="none",
+            command=self._update_advanced_method
+        ).pack(anchor=tk.W, padx=5, pady=2)
+        
         # 操作按钮
         action_frame = ttk.Frame(self.single_mode_frame)
         action_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -202,6 +265,31 @@ class WatermarkRemoverTab(ttk.Frame):
         )
         self.continue_edit_button.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=2, pady=5)
     
+    def _ensure_batch_mode_ui(self):
+        """首次使用批量模式时创建批量处理器和批量模式的UI"""
+        if self.batch_processor is not None:
+            return
+            
+        self.batch_processor = BatchWatermarkProcessor()
+        self._setup_batch_mode_ui()
+        
+        # 应用当前的处理参数
+        self.batch_processor.set_parameters(
+            self.radius_var.get(),
+            self.algorithm_var.get(),
+            self.advanced_method_var.get()
+        )
+        
+        # 读取快速模式设置
+        self.fast_mode_var.set(bool(self.config_manager.get_config("batch_fast_mode", False)))
+        self.batch_processor.set_fast_scale(_FAST_MODE_SCALE if self.fast_mode_var.get() else 1.0)
+        
+        # 读取输出目录
+        saved_output_dir = self.config_manager.get_config("output_dir", "")
+        if saved_output_dir and os.path.exists(saved_output_dir):
+            self.batch_processor.set_output_directory(saved_output_dir)
+            self.output_dir_label.config(text=f"输出目录: {saved_output_dir}")
+    
     def _setup_batch_mode_ui(self):
         """设置批量去水印模式的UI"""
         # 模板设置区域
@@ -262,33 +350,16 @@ class WatermarkRemoverTab(ttk.Frame):
         self.output_dir_label = ttk.Label(output_frame, text="未选择输出目录")
         self.output_dir_label.pack(padx=5, pady=5)
         
-        # 处理参数
-        param_frame = ttk.LabelFrame(self.batch_mode_frame, text="处理设置")
-        param_frame.pack(fill=tk.X, padx=5, pady=5)
+        # 处理参数使用与单张处理共用的设置区域，显示在输出设置之后
+        self._batch_param_anchor = output_frame
         
-        # 算法选择 (使用与单张处理相同的变量)
-        ttk.Label(param_frame, text="算法选择:").pack(anchor=tk.W, padx=5, pady=2)
-        ttk.Radiobutton(
-            param_frame, text="TELEA算法(快速修复)", 
-            variable=self.algorithm_var, value="TELEA",
-            command=self._update_algorithm
-        ).pack(anchor=tk.W, padx=5, pady=2)
-        
-        ttk.Radiobutton(
-            param_frame, text="NS算法(自然场修复)", 
-            variable=self.algorithm_var, value="NS",
-            command=self._update_algorithm
-        ).pack(anchor=tk.W, padx=5, pady=2)
-        
-        # 修复半径 (使用与单张处理相同的变量)
-        ttk.Label(param_frame, text="修复半径:").pack(anchor=tk.W, padx=5, pady=2)
-        radius_scale = ttk.Scale(
-            param_frame, from_=1, to=20, 
-            variable=self.radius_var,
-            orient=tk.HORIZONTAL, 
-            command=self._update_inpaint_radius
-        )
-        radius_scale.pack(fill=tk.X, padx=5, pady=5)
+        # 快速模式（只影响批量处理）
+        self.fast_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.batch_mode_frame, text="快速模式（缩小后修复，约快4倍）",
+            variable=self.fast_mode_var,
+            command=self._update_fast_mode
+        ).pack(anchor=tk.W, padx=10, pady=2)
         
         # 批量处理按钮
         self.batch_process_button = ttk.Button(
@@ -319,16 +390,15 @@ class WatermarkRemoverTab(ttk.Frame):
         saved_algorithm = self.config_manager.get_config("algorithm", "TELEA")
         self.algorithm_var.set(saved_algorithm)
         
-        # 读取输出目录
-        saved_output_dir = self.config_manager.get_config("output_dir", "")
-        if saved_output_dir and os.path.exists(saved_output_dir):
-            self.batch_processor.set_output_directory(saved_output_dir)
-            self.output_dir_label.config(text=f"输出目录: {saved_output_dir}")
+        # 读取高级修复方法
+        saved_method = self.config_manager.get_config("advanced_method", "none")
+        self.advanced_method_var.set(saved_method)
         
-        # 更新参数
+        # 更新参数（输出目录在创建批量处理器时读取）
         self._update_brush_size()
         self._update_inpaint_radius()
         self._update_algorithm()
+        self._update_advanced_method()
     
     def _load_single_image(self):
         """加载单张图像"""
@@ -343,26 +413,56 @@ class WatermarkRemoverTab(ttk.Frame):
         if not file_path:
             return
             
-        # 加载图像
-        if self.watermark_remover.load_image(file_path):
-            # 设置显示尺寸
-            self.watermark_remover.set_display_size(
-                self.canvas.winfo_width(), 
-                self.canvas.winfo_height()
-            )
-            
-            # 显示图像
-            preview = self.watermark_remover.get_masked_preview()
-            self._show_image(preview)
-            
-            # 更新状态
-            self._update_status(f"已加载: {os.path.basename(file_path)}")
-            
-            # 禁用保存按钮
-            self.save_button.config(state=tk.DISABLED)
-        else:
+        # 在独立线程中解码图像，避免大图加载时界面冻结
+        self._start_loading(f"正在加载: {os.path.basename(file_path)}")
+        threading.Thread(target=self._do_load_single, args=(file_path,), daemon=True).start()
+    
+    def _do_load_single(self, file_path):
+        """在独立线程中解码单张图像
+        
+        只解码到局部变量，不修改去除器；画布在加载期间仍可交互，
+        去除器的状态只在主线程中修改
+        
+        Args:
+            file_path: 图像文件路径
+        """
+        image = WatermarkRemover.read_image(file_path)
+        
+        # 在主线程中设置图像并更新UI
+        self.after(0, self._finish_load_single, image, file_path)
+    
+    def _finish_load_single(self, image, file_path):
+        """单张图像解码完成后设置到去除器并更新UI
+        
+        Args:
+            image: 解码后的图像，加载失败时为None
+            file_path: 图像文件路径
+        """
+        self._stop_loading()
+        
+        remover = self.watermark_remover
+        preview = None
+        if image is not None:
+            remover.set_image(image)
+            # 设置显示尺寸并生成预览
+            remover.set_display_size(self._canvas_w, self._canvas_h)
+            preview = remover.get_display_preview()
+        
+        if preview is None:
             # 显示错误
             messagebox.showerror("错误", "无法加载图像")
+            self._update_status("加载失败")
+            return
+        
+        # 显示图像（加载期间切换了标签页时不覆盖当前画布）
+        if remover is self._active_remover():
+            self._show_preview(remover, preview)
+        
+        # 更新状态
+        self._update_status(f"已加载: {os.path.basename(file_path)}")
+        
+        # 禁用保存按钮
+        self.save_button.config(state=tk.DISABLED)
     
     def _load_template_image(self):
         """加载模板图像"""
@@ -377,17 +477,66 @@ class WatermarkRemoverTab(ttk.Frame):
         if not file_path:
             return
             
-        # 加载模板图像
-        if self.batch_processor.set_template(file_path):
-            # 获取预览图像并显示
+        # 在独立线程中解码模板图像
+        self._start_loading(f"正在加载模板图像: {os.path.basename(file_path)}")
+        threading.Thread(target=self._do_load_template, args=(file_path,), daemon=True).start()
+    
+    def _do_load_template(self, file_path):
+        """在独立线程中解码模板图像（只解码到局部变量，不修改模板去除器）
+        
+        Args:
+            file_path: 模板图像路径
+        """
+        image = WatermarkRemover.read_image(file_path)
+        
+        # 在主线程中设置模板并更新UI
+        self.after(0, self._finish_load_template, image, file_path)
+    
+    def _finish_load_template(self, image, file_path):
+        """模板图像解码完成后设置到批处理器并更新UI
+        
+        Args:
+            image: 解码后的模板图像，加载失败时为None
+            file_path: 模板图像路径
+        """
+        self._stop_loading()
+        
+        template_remover = None
+        preview = None
+        if image is not None:
+            self.batch_processor.set_template_image(image)
+            # 设置显示尺寸（缩放因子取决于图像尺寸）并生成预览
             template_remover = self.batch_processor.get_template_remover()
-            preview = template_remover.get_masked_preview()
-            self._show_image(preview)
-            
-            # 更新状态
-            self._update_status(f"已加载模板图像: {os.path.basename(file_path)}")
-        else:
+            template_remover.set_display_size(self._canvas_w, self._canvas_h)
+            preview = template_remover.get_display_preview()
+        
+        if preview is None:
             messagebox.showerror("错误", f"无法加载模板图像: {file_path}")
+            self._update_status("加载失败")
+            return
+        
+        # 获取预览图像并显示（加载期间切换了标签页时不覆盖当前画布）
+        if template_remover is self._active_remover():
+            self._show_preview(template_remover, preview)
+        
+        # 更新状态
+        self._update_status(f"已加载模板图像: {os.path.basename(file_path)}")
+    
+    def _start_loading(self, message):
+        """显示加载中的进度条和状态
+        
+        Args:
+            message: 状态消息
+        """
+        self.progress_bar.config(mode='indeterminate')
+        self.progress_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5, pady=2)
+        self.progress_bar.start()
+        self._update_status(message)
+    
+    def _stop_loading(self):
+        """隐藏加载中的进度条"""
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
     
     def _select_batch_images(self, use_folder=False):
         """选择批量处理的图像文件
@@ -401,13 +550,12 @@ class WatermarkRemoverTab(ttk.Frame):
             if not folder_path:
                 return
                 
-            # 获取文件夹中的所有图像文件
-            image_files = []
-            for ext in [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]:
-                image_files.extend(
-                    [os.path.join(folder_path, f) for f in os.listdir(folder_path) 
-                     if f.lower().endswith(ext)]
-                )
+            # 在后台线程中扫描文件夹，大目录不会阻塞界面
+            self._update_status("正在扫描文件夹...")
+            threading.Thread(
+                target=self._scan_folder_thread, args=(folder_path,), daemon=True
+            ).start()
+            return
         else:
             # 选择多个文件
             image_files = filedialog.askopenfilenames(
@@ -418,6 +566,36 @@ class WatermarkRemoverTab(ttk.Frame):
                 ]
             )
         
+        self._set_batch_images(image_files)
+    
+    def _scan_folder_thread(self, folder_path):
+        """扫描文件夹中的图像文件的线程函数
+        
+        Args:
+            folder_path: 文件夹路径
+        """
+        try:
+            # 一次遍历目录，文件名由预编译的正则在C层匹配，不再逐个转换小写；
+            # 先匹配文件名，只有图像文件才检查类型（is_file在不提供d_type的文件系统上需要stat），
+            # DirEntry.path已是完整路径，不需要再拼接
+            with os.scandir(folder_path) as entries:
+                image_files = sorted(
+                    entry.path for entry in entries
+                    if _IMG_RE.search(entry.name) and entry.is_file()
+                )
+        except OSError as e:
+            self.after(0, self._show_error, f"无法读取文件夹: {e}")
+            return
+        
+        # 回到主线程更新界面
+        self.after(0, self._set_batch_images, image_files)
+    
+    def _set_batch_images(self, image_files):
+        """设置批量处理的图像并更新界面
+        
+        Args:
+            image_files: 图像文件路径列表
+        """
         if not image_files:
             return
             
@@ -446,36 +624,89 @@ class WatermarkRemoverTab(ttk.Frame):
         else:
             messagebox.showerror("错误", f"无法设置输出目录: {output_dir}")
     
+    def _active_remover(self):
+        """获取当前模式的水印去除器（按缓存的标签页选择，不查询Tk）
+        
+        Returns:
+            WatermarkRemover: 单张模式的去除器或批量模式的模板去除器
+        """
+        if self._current_tab == 0:  # 单张模式
+            return self.watermark_remover
+        if self.batch_processor is None:
+            return None
+        return self.batch_processor.get_template_remover()  # 批量模式
+    
+    def _on_canvas_configure(self, event):
+        """画布尺寸变化时更新缓存的尺寸，并同步当前去除器的显示尺寸"""
+        self._canvas_w = event.width
+        self._canvas_h = event.height
+        
+        # 尺寸未变化时不需要重新设置
+        if (event.width, event.height) == self._last_display_size:
+            return
+        self._last_display_size = (event.width, event.height)
+        
+        remover = self._active_remover()
+        if remover is not None:
+            remover.set_display_size(event.width, event.height)
+        
+        # 显示的是处理结果等普通图像时按新尺寸重新缩放
+        if self._shown_image is not None:
+            self._show_image(self._shown_image)
+            return
+        
+        if remover is None:
+            return
+        
+        # 画布上显示的是该去除器的预览时按新尺寸重绘，保持显示与坐标转换一致
+        if remover.image is not None and self._shown_preview_of is remover:
+            self._schedule_preview_redraw()
+    
+    def _place_param_frame(self, tab):
+        """把共用的去除设置区域移动到指定标签页中
+        
+        Args:
+            tab: 标签页索引，0为单张模式，1为批量模式
+        """
+        if tab == 0:
+            self.param_frame.config(text="去除设置")
+            self.param_frame.pack(after=self._single_param_anchor, fill=tk.X, padx=5, pady=5)
+        else:
+            self.param_frame.config(text="处理设置")
+            self.param_frame.pack(after=self._batch_param_anchor, fill=tk.X, padx=5, pady=5)
+    
     def _on_tab_changed(self, event):
         """处理标签页切换事件"""
-        # 获取当前选中的标签页
+        # 获取当前选中的标签页，并缓存供鼠标事件使用
         current_tab = self.mode_notebook.index(self.mode_notebook.select())
+        self._current_tab = current_tab
+        if current_tab == 1:
+            self._ensure_batch_mode_ui()
+        self._place_param_frame(current_tab)
         
         # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
+        self._clear_canvas_image()
         
         # 获取画布尺寸
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        canvas_width = self._canvas_w
+        canvas_height = self._canvas_h
+        self._last_display_size = (canvas_width, canvas_height)
         
         # 根据当前标签页加载对应的图像
         if current_tab == 0:  # 单张模式
             # 更新单张模式水印去除器的显示尺寸
             self.watermark_remover.set_display_size(canvas_width, canvas_height)
             
-            if hasattr(self.watermark_remover, 'image') and self.watermark_remover.image is not None:
-                preview = self.watermark_remover.get_masked_preview()
-                self._show_image(preview)
+            if self.watermark_remover.image is not None:
+                self._show_preview(self.watermark_remover)
         else:  # 批量模式
             # 更新模板水印去除器的显示尺寸
             template_remover = self.batch_processor.get_template_remover()
             if template_remover:
                 template_remover.set_display_size(canvas_width, canvas_height)
                 
-                if hasattr(template_remover, 'image') and template_remover.image is not None:
-                    preview = template_remover.get_masked_preview()
-                    self._show_image(preview)
+                if template_remover.image is not None:
+                    self._show_preview(template_remover)
                 
         # 更新状态
         tab_name = "单张去除" if current_tab == 0 else "批量去除"
@@ -488,36 +719,22 @@ class WatermarkRemoverTab(ttk.Frame):
         参数:
             event: 鼠标事件
         """
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前模式获取正确的水印去除器
-        if current_tab == 0:  # 单张模式
-            remover = self.watermark_remover
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
+        # 获取当前模式的水印去除器
+        remover = self._active_remover()
         
         # 检查是否有图像
         if remover is None or remover.image is None:
             return
         
-        # 获取画布尺寸
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        # 设置水印去除器的显示尺寸
-        remover.set_display_size(canvas_width, canvas_height)
-        
         self.drawing = True
         self.last_x = event.x
         self.last_y = event.y
         
         # 使用新的start_draw方法处理第一个点
-        remover.start_draw((event.x, event.y), self.brush_size_var.get())
+        self._mark_dirty(remover.start_draw((event.x, event.y), self.brush_size_var.get()))
         
         # 更新预览
-        preview = remover.get_masked_preview()
-        self._show_image(preview)
+        self._schedule_preview_redraw()
     
     def _draw(self, event):
         """
@@ -529,81 +746,145 @@ class WatermarkRemoverTab(ttk.Frame):
         if not self.drawing:
             return
             
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前模式获取正确的水印去除器
-        if current_tab == 0:  # 单张模式
-            remover = self.watermark_remover
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
+        # 获取当前模式的水印去除器
+        remover = self._active_remover()
         
         # 检查是否有图像
         if remover is None or remover.image is None:
             return
         
-        # 获取画布尺寸并确保设置正确
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        remover.set_display_size(canvas_width, canvas_height)
-        
-        # 使用改进的draw_line_on_mask方法绘制线条
-        remover.draw_line_on_mask((self.last_x, self.last_y), (event.x, event.y), self.brush_size_var.get())
+        # 使用改进的draw_line_on_mask方法绘制线条（每个事件都写入掩码，开销很小）
+        self._mark_dirty(remover.draw_line_on_mask(
+            (self.last_x, self.last_y), (event.x, event.y), self.brush_size_var.get()))
         
         # 更新上一个点的位置
         self.last_x = event.x
         self.last_y = event.y
         
-        # 更新预览
-        preview = remover.get_masked_preview()
-        self._show_image(preview)
+        # 画笔预览圆跟随鼠标
+        self._move_brush_oval(event.x, event.y, remover)
+        
+        # 预览刷新合并到空闲时执行，连续的移动事件只重绘一次
+        self._schedule_preview_redraw()
+    
+    def _mark_dirty(self, rect):
+        """合并记录掩码被修改的图像区域
+        
+        Args:
+            rect: 图像坐标中的矩形 (x0, y0, x1, y1)，为None时忽略
+        """
+        if rect is None:
+            return
+        if self._dirty_rect is None:
+            self._dirty_rect = rect
+        else:
+            x0, y0, x1, y1 = self._dirty_rect
+            self._dirty_rect = (min(x0, rect[0]), min(y0, rect[1]),
+                                max(x1, rect[2]), max(y1, rect[3]))
+    
+    def _schedule_preview_redraw(self):
+        """安排在空闲时刷新掩码预览，已有待执行的刷新时不重复安排"""
+        if not self._pending_redraw:
+            self._pending_redraw = True
+            self.after_idle(self._flush_preview)
+    
+    def _flush_preview(self):
+        """刷新当前模式的掩码预览"""
+        self._pending_redraw = False
+        
+        # 获取当前模式的水印去除器
+        remover = self._active_remover()
+            
+        rect = self._dirty_rect
+        self._dirty_rect = None
+        
+        if remover is None or remover.image is None:
+            return
+            
+        # 画布上已是该去除器的预览且尺寸未变时，只贴回被修改的区域
+        canvas_size = (self._canvas_w, self._canvas_h)
+        if (rect is not None and self.tk_image is not None
+                and self._shown_preview_of is remover
+                and self._display_canvas_size == canvas_size):
+            self._paste_preview_region(remover, rect)
+        else:
+            self._show_preview(remover)
+    
+    def _show_preview(self, remover, preview=None):
+        """在画布上完整显示去除器的掩码预览
+        
+        预览已由去除器按显示尺寸合成，直接显示而不再缩放
+        
+        Args:
+            remover: 水印去除器
+            preview: 已生成的显示尺寸预览，为None时向去除器获取
+        """
+        if preview is None:
+            # 画布上已是该预览的当前版本时不再重新显示
+            if (self.tk_image is not None and self._shown_preview_of is remover
+                    and self._shown_generation == remover.preview_generation
+                    and self._display_canvas_size == (self._canvas_w, self._canvas_h)):
+                return
+            preview = remover.get_display_preview()
+        if preview is None:
+            return
+        
+        # 转换到常驻的RGB缓冲区，再直接引用该缓冲区构造PIL图像，每次重绘不再分配新数组
+        rgb = self._rgb_buffer
+        if rgb is None or rgb.shape != preview.shape:
+            rgb = self._rgb_buffer = np.empty_like(preview)
+        cv2.cvtColor(preview, cv2.COLOR_BGR2RGB, dst=rgb)
+        height, width = rgb.shape[:2]
+        self._put_image(Image.frombuffer("RGB", (width, height), rgb, "raw", "RGB", 0, 1))
+        self._shown_preview_of = remover
+        self._shown_generation = remover.preview_generation
+    
+    def _paste_preview_region(self, remover, rect):
+        """把显示预览中被修改的区域贴到已显示的图像上
+        
+        Args:
+            remover: 水印去除器
+            rect: 图像坐标中的矩形 (x0, y0, x1, y1)
+        """
+        preview = remover.get_display_preview()
+        dx0, dy0, dx1, dy1 = remover.display_rect(rect)
+        if dx1 <= dx0 or dy1 <= dy0:
+            return
+        
+        region = cv2.cvtColor(preview[dy0:dy1, dx0:dx1], cv2.COLOR_BGR2RGB)
+        
+        # 通过Tk图像的copy命令只更新该区域，不重建整幅PhotoImage
+        region_photo = ImageTk.PhotoImage(Image.fromarray(region))
+        self.tk.call(str(self.tk_image), "copy", str(region_photo), "-to", dx0, dy0)
+        self._shown_generation = remover.preview_generation
     
     def _stop_draw(self, event):
         """停止绘制掩码"""
         self.drawing = False
         
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
         # 保存掩码历史（如果需要）
-        if current_tab == 0:  # 单张模式
-            if hasattr(self.watermark_remover, '_save_mask_to_history'):
-                self.watermark_remover._save_mask_to_history()
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
-            if remover and hasattr(remover, '_save_mask_to_history'):
-                remover._save_mask_to_history()
+        remover = self._active_remover()
+        if remover is not None:
+            remover._save_mask_to_history()
     
     def _clear_mask(self):
         """清除掩码"""
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        if current_tab == 0:  # 单张模式
-            remover = self.watermark_remover
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
+        # 获取当前模式的水印去除器
+        remover = self._active_remover()
         
-        # 清除掩码
-        remover.clear_mask()
-        
-        # 更新预览
-        preview = remover.get_masked_preview()
-        self._show_image(preview)
+        # 清除掩码，有变化时才更新预览
+        if remover.clear_mask():
+            self._show_preview(remover)
         
         # 更新状态
         self._update_status("已清除标记")
     
     def _undo_mark(self, event=None):
         """撤销最后一次标记"""
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        if current_tab == 0:  # 单张模式
+        if self._current_tab == 0:  # 单张模式
             if self.watermark_remover.undo_mask():
-                # 更新预览
-                preview = self.watermark_remover.get_masked_preview()
-                self._show_image(preview)
+                # 更新预览（快照内容相同时预览版本不变，不会重新显示）
+                self._show_preview(self.watermark_remover)
                 
                 # 更新状态
                 self._update_status("已撤销标记")
@@ -615,14 +896,10 @@ class WatermarkRemoverTab(ttk.Frame):
     
     def _redo_mark(self, event=None):
         """重做标记"""
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        if current_tab == 0:  # 单张模式
+        if self._current_tab == 0:  # 单张模式
             if self.watermark_remover.redo_mask():
-                # 更新预览
-                preview = self.watermark_remover.get_masked_preview()
-                self._show_image(preview)
+                # 更新预览（快照内容相同时预览版本不变，不会重新显示）
+                self._show_preview(self.watermark_remover)
                 
                 # 更新状态
                 self._update_status("已重做标记")
@@ -635,12 +912,12 @@ class WatermarkRemoverTab(ttk.Frame):
     def _remove_watermark(self):
         """去除水印"""
         # 检查是否有图像
-        if not hasattr(self.watermark_remover, 'image') or self.watermark_remover.image is None:
+        if self.watermark_remover.image is None:
             messagebox.showinfo("提示", "请先加载图像")
             return
             
         # 检查是否有水印标记
-        if np.max(self.watermark_remover.mask) == 0:
+        if not self.watermark_remover.has_mask():
             messagebox.showinfo("提示", "请先标记水印区域")
             return
         
@@ -662,10 +939,10 @@ class WatermarkRemoverTab(ttk.Frame):
             success = self.watermark_remover.remove_watermark()
             
             # 在主线程中更新UI
-            self.after(0, lambda: self._update_after_processing(success))
+            self.after(0, self._update_after_processing, success)
         except Exception as e:
             # 在主线程中显示错误
-            self.after(0, lambda: self._show_error(f"处理时出错: {e}"))
+            self.after(0, self._show_error, f"处理时出错: {e}")
     
     def _update_after_processing(self, success):
         """处理完成后更新UI
@@ -696,7 +973,7 @@ class WatermarkRemoverTab(ttk.Frame):
     def _save_result(self):
         """保存处理结果"""
         # 检查是否有处理结果
-        if not hasattr(self.watermark_remover, 'result_image') or self.watermark_remover.result_image is None:
+        if self.watermark_remover.result_image is None:
             messagebox.showinfo("提示", "没有可保存的结果")
             return
             
@@ -726,15 +1003,16 @@ class WatermarkRemoverTab(ttk.Frame):
     
     def _start_batch_processing(self):
         """开始批量处理"""
-        # 开始批量处理
+        # 开始批量处理（回调在处理线程中触发，统一转交到界面线程执行）
         success = self.batch_processor.start_batch_processing(
-            progress_callback=self._update_batch_progress,
-            complete_callback=self._on_batch_complete,
-            error_callback=self._show_error
+            progress_callback=self._post_batch_progress,
+            complete_callback=self._post_batch_complete,
+            error_callback=self._post_error
         )
         
         if success:
             # 显示进度条
+            self._last_pct = 0
             self.progress_bar.config(mode='determinate', value=0)
             self.progress_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5, pady=2)
             
@@ -755,6 +1033,48 @@ class WatermarkRemoverTab(ttk.Frame):
         # 更新状态
         self._update_status("正在停止处理...")
     
+    def _post_batch_progress(self, current, total):
+        """从处理线程把进度更新转交到界面线程
+        
+        只记录最新进度，界面按固定间隔刷新一次，小图像批量处理时
+        每秒上千次的进度回调不会占满事件循环
+        
+        Args:
+            current: 当前处理数量
+            total: 总数量
+        """
+        self._pending_progress = (current, total)
+        if not self._progress_scheduled:
+            self._progress_scheduled = True
+            self.after(_PROGRESS_INTERVAL_MS, self._flush_batch_progress)
+    
+    def _flush_batch_progress(self):
+        """在界面线程显示最新的批量处理进度"""
+        # 先清除标志再读取进度，期间上报的进度会安排下一次刷新
+        self._progress_scheduled = False
+        progress = self._pending_progress
+        self._pending_progress = None
+        if progress is not None:
+            self._update_batch_progress(*progress)
+    
+    def _post_batch_complete(self, success_count, total_count, failed_paths):
+        """从处理线程把完成通知转交到界面线程
+        
+        Args:
+            success_count: 成功处理数量
+            total_count: 总数量
+            failed_paths: 失败的文件路径列表
+        """
+        self.after(0, self._on_batch_complete, success_count, total_count, failed_paths)
+    
+    def _post_error(self, message):
+        """从其他线程把错误消息转交到界面线程显示
+        
+        Args:
+            message: 错误消息
+        """
+        self.after(0, self._show_error, message)
+    
     def _update_batch_progress(self, current, total):
         """更新批量处理进度
         
@@ -763,13 +1083,15 @@ class WatermarkRemoverTab(ttk.Frame):
             total: 总数量
         """
         # 计算进度百分比
-        percent = int((current / total) * 100)
+        percent = current * 100 // total
         
-        # 更新进度条
-        self.progress_bar.config(value=percent)
+        # 百分比变化时才更新进度条
+        if percent != self._last_pct:
+            self._last_pct = percent
+            self.progress_bar.config(value=percent)
         
         # 更新状态
-        self._update_status(f"正在处理: {current}/{total} - {percent}%")
+        self._update_status(_PROGRESS_FMT(current, total, percent))
     
     def _on_batch_complete(self, success_count, total_count, failed_paths):
         """批量处理完成回调
@@ -779,7 +1101,8 @@ class WatermarkRemoverTab(ttk.Frame):
             total_count: 总数量
             failed_paths: 失败的文件路径列表
         """
-        # 隐藏进度条
+        # 丢弃尚未显示的进度并隐藏进度条
+        self._pending_progress = None
         self.progress_bar.pack_forget()
         
         # 更新按钮状态
@@ -828,68 +1151,51 @@ class WatermarkRemoverTab(ttk.Frame):
         if self.drawing:
             return
             
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前模式获取正确的水印去除器
-        if current_tab == 0:  # 单张模式
-            remover = self.watermark_remover
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
+        # 获取当前模式的水印去除器
+        remover = self._active_remover()
             
         # 检查是否有图像
         if remover is None or remover.image is None:
-            self.canvas.delete("brush_preview")
+            self.canvas.itemconfigure(self._brush_oval, state="hidden")
             return
-        
-        # 获取画布尺寸并确保设置正确
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        remover.set_display_size(canvas_width, canvas_height)
             
-        # 显示画笔预览
-        brush_size = self.brush_size_var.get()
-        
-        # 删除旧的预览
-        self.canvas.delete("brush_preview")
-        
-        # 获取带有预览的图像
-        preview_image = remover.show_brush_preview((event.x, event.y), brush_size)
+        # 只记录最新位置，连续的鼠标移动事件合并为一次空闲时的移动
+        self._pending_cursor = (event.x, event.y)
+        if not self._cursor_scheduled:
+            self._cursor_scheduled = True
+            self.after_idle(self._flush_brush_preview)
+    
+    def _flush_brush_preview(self):
+        """把画笔预览圆移动到最近一次记录的鼠标位置"""
+        self._cursor_scheduled = False
+        pos = self._pending_cursor
+        self._pending_cursor = None
+        if pos is None or self.drawing:
+            return
+        remover = self._active_remover()
+        if remover is None or remover.image is None:
+            return
+        # 移动常驻的预览圆，不重新生成整幅预览图像
+        self._move_brush_oval(pos[0], pos[1], remover)
+    
+    def _move_brush_oval(self, x, y, remover):
+        """把画笔预览圆移动到画布坐标(x, y)并显示
         
-        if preview_image is not None:
-            self._show_image(preview_image)
-        else:
-            # 在鼠标位置绘制圆形预览
-            self.canvas.create_oval(
-                event.x - brush_size // 2,
-                event.y - brush_size // 2,
-                event.x + brush_size // 2,
-                event.y + brush_size // 2,
-                outline="red",
-                width=2,
-                tags="brush_preview"
-            )
+        Args:
+            x: 画布x坐标
+            y: 画布y坐标
+            remover: 当前的水印去除器，用于把图像像素的画笔大小换算为显示大小
+        """
+        # 画笔大小以图像像素计，按显示缩放换算为画布上的半径
+        r = max(1, self.brush_size_var.get() // 2) * remover.scale_factor
+        self.canvas.coords(self._brush_oval, x - r, y - r, x + r, y + r)
+        self.canvas.itemconfigure(self._brush_oval, state="normal")
     
     def _hide_brush_preview(self, event):
         """隐藏画笔预览"""
-        # 删除预览
-        self.canvas.delete("brush_preview")
-        
-        # 恢复原始图像显示
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前标签页显示对应的图像
-        if current_tab == 0:  # 单张模式
-            if hasattr(self.watermark_remover, 'image') and self.watermark_remover.image is not None:
-                preview = self.watermark_remover.get_masked_preview()
-                if preview is not None:
-                    self._show_image(preview)
-        else:  # 批量模式
-            template_remover = self.batch_processor.get_template_remover()
-            if template_remover and hasattr(template_remover, 'image') and template_remover.image is not None:
-                preview = template_remover.get_masked_preview()
-                if preview is not None:
-                    self._show_image(preview)
+        # 只隐藏预览圆，画布上的图像不需要重绘；丢弃尚未执行的移动
+        self._pending_cursor = None
+        self.canvas.itemconfigure(self._brush_oval, state="hidden")
     
     def _update_brush_size(self, *args):
         """更新画笔大小"""
@@ -900,11 +1206,10 @@ class WatermarkRemoverTab(ttk.Frame):
         self.watermark_remover.update_brush_size(value)
         
         # 更新画笔大小显示标签
-        if hasattr(self, 'brush_size_label'):
-            self.brush_size_label.config(text=str(value))
+        self.brush_size_label.config(text=str(value))
         
-        # 保存到配置
-        self.config_manager.save_config("brush_size", value)
+        # 保存到配置（延迟写入文件）
+        self._save_config_later("brush_size", value)
         
         # 更新状态
         self._update_status(f"画笔大小: {value}")
@@ -914,18 +1219,24 @@ class WatermarkRemoverTab(ttk.Frame):
         # 获取当前值
         value = self.radius_var.get()
         
+        # 滑块拖动时每移动一个像素都会触发，取整后的值未变化时不做任何处理
+        if self._applied_params.get("inpaint_radius") == value:
+            return
+        self._applied_params["inpaint_radius"] = value
+        
         # 更新水印去除器设置
         self.watermark_remover.set_inpaint_radius(value)
         
-        # 更新批处理器设置
-        self.batch_processor.set_parameters(
-            value, 
-            self.algorithm_var.get(), 
-            "none"
-        )
+        # 更新批处理器设置（尚未创建时，创建后会读取当前参数）
+        if self.batch_processor is not None:
+            self.batch_processor.set_parameters(
+                value, 
+                self.algorithm_var.get(), 
+                self.advanced_method_var.get()
+            )
         
-        # 保存到配置
-        self.config_manager.save_config("inpaint_radius", value)
+        # 保存到配置（延迟写入文件）
+        self._save_config_later("inpaint_radius", value)
         
         # 更新状态
         self._update_status(f"修复半径: {value}")
@@ -935,290 +1246,84 @@ class WatermarkRemoverTab(ttk.Frame):
         # 获取当前值
         value = self.algorithm_var.get()
         
+        # 重复点击已选中的算法时不做任何处理
+        if self._applied_params.get("algorithm") == value:
+            return
+        self._applied_params["algorithm"] = value
+        
         # 更新水印去除器设置
         self.watermark_remover.set_algorithm(value)
         
-        # 更新批处理器设置
-        self.batch_processor.set_parameters(
-            self.radius_var.get(),
-            value,
-            "none"
-        )
+        # 更新批处理器设置（尚未创建时，创建后会读取当前参数）
+        if self.batch_processor is not None:
+            self.batch_processor.set_parameters(
+                self.radius_var.get(),
+                value,
+                self.advanced_method_var.get()
+            )
         
-        # 保存到配置
-        self.config_manager.save_config("algorithm", value)
+        # 保存到配置（延迟写入文件）
+        self._save_config_later("algorithm", value)
         
         # 更新状态
         self._update_status(f"算法: {value}")
     
-    def _show_image(self, image):
-        """在画布上显示图像
+    def _update_advanced_method(self, *args):
+        """更新高级修复方法设置"""
+        # 获取当前值
+        value = self.advanced_method_var.get()
         
-        Args:
-            image: OpenCV格式的图像 (numpy.ndarray)
-        """
-        if image is None:
+        # 取值未变化时不做任何处理
+        if self._applied_params.get("advanced_method") == value:
             return
-            
-        # 转换为PIL格式
-        if len(image.shape) == 3:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-            
-        pil_image = Image.fromarray(image_rgb)
+        self._applied_params["advanced_method"] = value
         
-        # 获取画布大小
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        # 如果画布尚未实际显示，使用默认大小
-        if canvas_width <= 1:
-            canvas_width = 800
-        if canvas_height <= 1:
-            canvas_height = 600
-        
-        # 调整图像大小以适应画布
-        image_width, image_height = pil_image.size
-        scale = min(canvas_width / image_width, canvas_height / image_height) * 0.9
-        
-        new_width = int(image_width * scale)
-        new_height = int(image_height * scale)
-        
-        resized_image = pil_image.resize((new_width, new_height), Image.LANCZOS)
-        
-        # 创建Tkinter图像
-        self.tk_image = ImageTk.PhotoImage(resized_image)
-        
-        # 计算居中位置
-        x_pos = (canvas_width - new_width) // 2
-        y_pos = (canvas_height - new_height) // 2
-        
-        # 保存图像位置，用于坐标转换
-        self.image_x_offset = x_pos
-        self.image_y_offset = y_pos
+        # 更新水印去除器设置
+        self.watermark_remover.set_advanced_method(value)
+        
+        # 更新批处理器设置（尚未创建时，创建后会读取当前参数）
+        if self.batch_processor is not None:
+            self.batch_processor.set_parameters(
+                self.radius_var.get(),
+                self.algorithm_var.get(),
+                value
+            )
         
-        # 在画布上显示图像
-        self.canvas.delete("all")
-        self.canvas_image = self.canvas.create_image(x_pos, y_pos, anchor=tk.NW, image=self.tk_image)
-    
-    def _update_status(self, message):
-        """更新状态栏信息
+        # 保存到配置（延迟写入文件）
+        self._save_config_later("advanced_method", value)
         
-        Args:
-            message: 状态消息
-        """
-        self.status_label.config(text=message)
+        # 更新状态
+        self._update_status("泊松填充: " + ("开启" if value == "poisson" else "关闭"))
     
-    def _show_error(self, message):
-        """显示错误消息
+    def _save_config_later(self, key, value):
+        """记录参数修改，在一段时间内没有新的修改后再写入配置文件
         
         Args:
-            message: 错误消息
+            key: 配置项键名
+            value: 配置项值
         """
-        messagebox.showerror("错误", message)
-        self._update_status("出错: " + message.split("\n")[0])
-
-    def _setup_shortcuts(self):
-        """设置键盘快捷键"""
-        # 撤销 - Ctrl+Z
-        self.bind_all("<Control-z>", self._undo_mark)
-        
-        # 重做 - Ctrl+Y
-        self.bind_all("<Control-y>", self._redo_mark)
-        
-        # 清除 - Ctrl+Delete
-        self.bind_all("<Control-Delete>", self._clear_mask)
-    
-    def _continue_edit_result(self):
-        """继续编辑处理结果"""
-        # 检查是否有处理结果
-        if not hasattr(self.watermark_remover, 'result_image') or self.watermark_remover.result_image is None:
-            messagebox.showinfo("提示", "没有可编辑的结果")
-            return
-            
-        # 将结果设置为当前图像并继续编辑
-        if self.watermark_remover.continue_edit_result():
-            # 获取预览图像并显示
-            preview = self.watermark_remover.get_masked_preview()
-            self._show_image(preview)
-            
-            # 禁用保存和继续编辑按钮
-            self.save_button.config(state=tk.DISABLED)
-            self.continue_edit_button.config(state=tk.DISABLED)
-            
-            # 更新状态
-            self._update_status("已切换到编辑模式，可以继续标记水印区域")
-        else:
-            # 显示错误
-            messagebox.showerror("错误", "无法继续编辑")
-
-    def _clear_single_image(self):
-        """清空单张模式的图像"""
-        # 重置水印去除器
-        self.watermark_remover = WatermarkRemover()
-        
-        # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
-        
-        # 禁用保存按钮
-        self.save_button.config(state=tk.DISABLED)
-        self.continue_edit_button.config(state=tk.DISABLED)
-        
-        # 更新状态
-        self._update_status("已清空图像")
-    
-    def _clear_template_image(self):
-        """清空模板图像"""
-        # 重置模板
-        self.batch_processor.reset_template()
-        
-        # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
-        
-        # 更新状态
-        self._update_status("已清空模板图像")
-    
-    def _clear_batch_images(self):
-        """清空批量处理的图像列表"""
-        # 清空批量图像列表
-        self.batch_processor.clear_batch_images()
-        
-        # 更新文件数量显示
-        self.file_count_label.config(text="已选择: 0 个文件")
-        
-        # 更新状态
-        self._update_status("已清空批量图像列表")
-    
-    def _show_brush_preview(self, event):
-        """显示画笔预览"""
-        if self.drawing:
-            return
-            
-        # 获取当前模式
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前模式获取正确的水印去除器
-        if current_tab == 0:  # 单张模式
-            remover = self.watermark_remover
-        else:  # 批量模式
-            remover = self.batch_processor.get_template_remover()
-            
-        # 检查是否有图像
-        if remover is None or remover.image is None:
-            self.canvas.delete("brush_preview")
-            return
-        
-        # 获取画布尺寸并确保设置正确
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        remover.set_display_size(canvas_width, canvas_height)
-            
-        # 显示画笔预览
-        brush_size = self.brush_size_var.get()
-        
-        # 删除旧的预览
-        self.canvas.delete("brush_preview")
-        
-        # 获取带有预览的图像
-        preview_image = remover.show_brush_preview((event.x, event.y), brush_size)
-        
-        if preview_image is not None:
-            self._show_image(preview_image)
-        else:
-            # 在鼠标位置绘制圆形预览
-            self.canvas.create_oval(
-                event.x - brush_size // 2,
-                event.y - brush_size // 2,
-                event.x + brush_size // 2,
-                event.y + brush_size // 2,
-                outline="red",
-                width=2,
-                tags="brush_preview"
-            )
+        self._config_dirty[key] = value
+        if self._config_after_id:
+            self.after_cancel(self._config_after_id)
+        self._config_after_id = self.after(_CONFIG_SAVE_DELAY_MS, self._flush_config)
     
-    def _hide_brush_preview(self, event):
-        """隐藏画笔预览"""
-        # 删除预览
-        self.canvas.delete("brush_preview")
-        
-        # 恢复原始图像显示
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 根据当前标签页显示对应的图像
-        if current_tab == 0:  # 单张模式
-            if hasattr(self.watermark_remover, 'image') and self.watermark_remover.image is not None:
-                preview = self.watermark_remover.get_masked_preview()
-                if preview is not None:
-                    self._show_image(preview)
-        else:  # 批量模式
-            template_remover = self.batch_processor.get_template_remover()
-            if template_remover and hasattr(template_remover, 'image') and template_remover.image is not None:
-                preview = template_remover.get_masked_preview()
-                if preview is not None:
-                    self._show_image(preview)
-    
-    def _update_brush_size(self, *args):
-        """更新画笔大小"""
-        # 获取当前值
-        value = self.brush_size_var.get()
-        
-        # 使用water_remover中的方法更新画笔大小
-        self.watermark_remover.update_brush_size(value)
-        
-        # 更新画笔大小显示标签
-        if hasattr(self, 'brush_size_label'):
-            self.brush_size_label.config(text=str(value))
-        
-        # 保存到配置
-        self.config_manager.save_config("brush_size", value)
-        
-        # 更新状态
-        self._update_status(f"画笔大小: {value}")
-    
-    def _update_inpaint_radius(self, *args):
-        """更新修复半径"""
-        # 获取当前值
-        value = self.radius_var.get()
-        
-        # 更新水印去除器设置
-        self.watermark_remover.set_inpaint_radius(value)
-        
-        # 更新批处理器设置
-        self.batch_processor.set_parameters(
-            value, 
-            self.algorithm_var.get(), 
-            "none"
-        )
-        
-        # 保存到配置
-        self.config_manager.save_config("inpaint_radius", value)
-        
-        # 更新状态
-        self._update_status(f"修复半径: {value}")
+    def _flush_config(self):
+        """把尚未保存的参数写入配置文件"""
+        self._config_after_id = None
+        dirty, self._config_dirty = self._config_dirty, {}
+        for key, value in dirty.items():
+            self.config_manager.save_config(key, value)
     
-    def _update_algorithm(self, *args):
-        """更新算法设置"""
-        # 获取当前值
-        value = self.algorithm_var.get()
-        
-        # 更新水印去除器设置
-        self.watermark_remover.set_algorithm(value)
-        
-        # 更新批处理器设置
-        self.batch_processor.set_parameters(
-            self.radius_var.get(),
-            value,
-            "none"
-        )
+    def _update_fast_mode(self):
+        """更新批量处理的快速模式设置"""
+        value = self.fast_mode_var.get()
+        self.batch_processor.set_fast_scale(_FAST_MODE_SCALE if value else 1.0)
         
-        # 保存到配置
-        self.config_manager.save_config("algorithm", value)
+        # 保存到配置（延迟写入文件）
+        self._save_config_later("batch_fast_mode", value)
         
         # 更新状态
-        self._update_status(f"算法: {value}")
+        self._update_status("快速模式: " + ("开启" if value else "关闭"))
     
     def _show_image(self, image):
         """在画布上显示图像
@@ -1228,18 +1333,16 @@ class WatermarkRemoverTab(ttk.Frame):
         """
         if image is None:
             return
-            
-        # 转换为PIL格式
-        if len(image.shape) == 3:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-            
-        pil_image = Image.fromarray(image_rgb)
+        source = image
+        
+        # 同一图像已按当前画布尺寸显示时，复用已有的Tkinter图像，跳过颜色转换和缩放
+        if (image is self._shown_image and self.tk_image is not None
+                and self._display_canvas_size == (self._canvas_w, self._canvas_h)):
+            return
         
         # 获取画布大小
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        canvas_width = self._canvas_w
+        canvas_height = self._canvas_h
         
         # 如果画布尚未实际显示，使用默认大小
         if canvas_width <= 1:
@@ -1247,29 +1350,87 @@ class WatermarkRemoverTab(ttk.Frame):
         if canvas_height <= 1:
             canvas_height = 600
         
-        # 调整图像大小以适应画布
-        image_width, image_height = pil_image.size
-        scale = min(canvas_width / image_width, canvas_height / image_height) * 0.9
-        
-        new_width = int(image_width * scale)
-        new_height = int(image_height * scale)
+        # 调整图像大小以适应画布，画布和图像尺寸不变时复用上次计算的显示尺寸
+        image_height, image_width = image.shape[:2]
+        key = (canvas_width, canvas_height, image_width, image_height)
+        cached_key, geometry = self._display_geometry
+        if cached_key == key:
+            new_width, new_height, prereduce = geometry
+        else:
+            new_width, new_height, prereduce = _mask_kernels.display_geometry(*key)
+            self._display_geometry = (key, (new_width, new_height, prereduce))
+        
+        # 缩小倍数较大时先按整数倍区域平均缩小，保留至少2倍留给LANCZOS做最终缩放
+        if prereduce > 1:
+            image = cv2.resize(image, (image_width // prereduce, image_height // prereduce),
+                               interpolation=cv2.INTER_AREA)
+        
+        # 用OpenCV完成最终缩放，颜色转换放到缩放之后的小图上进行，不再复制整幅原图
+        resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
+        if resized.dtype != np.uint8:
+            # 去除器的图像统一为uint8，其他类型（如浮点）在缩放后的小图上一次转换，按0-255截断
+            resized = np.clip(resized, 0, 255).astype(np.uint8)
+        if resized.ndim == 3:
+            # 缩放结果是本函数独有的缓冲区，原地交换红蓝通道，不再分配新数组
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=resized)
+        else:
+            resized = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
         
-        resized_image = pil_image.resize((new_width, new_height), Image.LANCZOS)
+        # 直接引用连续的RGB缓冲区构造PIL图像，只用于贴入Tkinter图像
+        display_image = Image.frombuffer("RGB", (new_width, new_height), resized, "raw", "RGB", 0, 1)
+        self._put_image(display_image)
+        self._shown_image = source
+    
+    def _put_image(self, display_image):
+        """把已是显示尺寸的图像居中显示在画布上
         
-        # 创建Tkinter图像
-        self.tk_image = ImageTk.PhotoImage(resized_image)
+        Args:
+            display_image: 显示尺寸的PIL RGB图像
+        """
+        new_width, new_height = display_image.size
         
-        # 计算居中位置
-        x_pos = (canvas_width - new_width) // 2
-        y_pos = (canvas_height - new_height) // 2
+        # 已有相同尺寸的Tkinter图像时把新内容贴入其中，否则重新创建并放入池中
+        photo = self._photo_pool.get((new_width, new_height))
+        if photo is not None:
+            photo.paste(display_image)
+        else:
+            if len(self._photo_pool) >= _PHOTO_POOL_SIZE:
+                # 丢弃最早放入的图像（不丢弃正在显示的图像）
+                for size, old in self._photo_pool.items():
+                    if old is not self.tk_image:
+                        del self._photo_pool[size]
+                        break
+            photo = ImageTk.PhotoImage(display_image)
+            self._photo_pool[(new_width, new_height)] = photo
+        if photo is not self.tk_image:
+            self.tk_image = photo
+            self.canvas.itemconfigure(self.canvas_image, image=photo)
+        
+        # 计算居中位置（与去除器的坐标转换一致，画布尚未显示时使用默认大小）
+        canvas_width = self._canvas_w if self._canvas_w > 1 else 800
+        canvas_height = self._canvas_h if self._canvas_h > 1 else 600
+        x_pos = max(0, (canvas_width - new_width) // 2)
+        y_pos = max(0, (canvas_height - new_height) // 2)
         
         # 保存图像位置，用于坐标转换
         self.image_x_offset = x_pos
         self.image_y_offset = y_pos
         
-        # 在画布上显示图像
-        self.canvas.delete("all")
-        self.canvas_image = self.canvas.create_image(x_pos, y_pos, anchor=tk.NW, image=self.tk_image)
+        # 记录显示时的画布尺寸，用于判断能否局部刷新
+        self._display_canvas_size = (self._canvas_w, self._canvas_h)
+        self._shown_preview_of = None
+        self._shown_image = None
+        
+        # 移动常驻的图像项并显示
+        self.canvas.coords(self.canvas_image, x_pos, y_pos)
+        self.canvas.itemconfigure(self.canvas_image, state="normal")
+    
+    def _clear_canvas_image(self):
+        """隐藏画布上的图像并释放Tkinter图像"""
+        self.canvas.itemconfigure(self.canvas_image, state="hidden", image="")
+        self.tk_image = None
+        self._shown_preview_of = None
+        self._shown_image = None
     
     def _update_status(self, message):
         """更新状态栏信息
@@ -1302,15 +1463,14 @@ class WatermarkRemoverTab(ttk.Frame):
     def _continue_edit_result(self):
         """继续编辑处理结果"""
         # 检查是否有处理结果
-        if not hasattr(self.watermark_remover, 'result_image') or self.watermark_remover.result_image is None:
+        if self.watermark_remover.result_image is None:
             messagebox.showinfo("提示", "没有可编辑的结果")
             return
             
         # 将结果设置为当前图像并继续编辑
         if self.watermark_remover.continue_edit_result():
             # 获取预览图像并显示
-            preview = self.watermark_remover.get_masked_preview()
-            self._show_image(preview)
+            self._show_preview(self.watermark_remover)
             
             # 禁用保存和继续编辑按钮
             self.save_button.config(state=tk.DISABLED)
@@ -1324,12 +1484,11 @@ class WatermarkRemoverTab(ttk.Frame):
 
     def _clear_single_image(self):
         """清空单张模式的图像"""
-        # 重置水印去除器
-        self.watermark_remover = WatermarkRemover()
+        # 重置水印去除器（保留当前的处理参数和显示尺寸）
+        self.watermark_remover.reset()
         
         # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
+        self._clear_canvas_image()
         
         # 禁用保存按钮
         self.save_button.config(state=tk.DISABLED)
@@ -1344,8 +1503,7 @@ class WatermarkRemoverTab(ttk.Frame):
         self.batch_processor.reset_template()
         
         # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
+        self._clear_canvas_image()
         
         # 更新状态
         self._update_status("已清空模板图像")
@@ -1361,37 +1519,11 @@ class WatermarkRemoverTab(ttk.Frame):
         # 更新状态
         self._update_status("已清空批量图像列表")
     
-    def _on_tab_changed(self, event):
-        """处理标签页切换事件"""
-        # 获取当前选中的标签页
-        current_tab = self.mode_notebook.index(self.mode_notebook.select())
-        
-        # 清空画布
-        self.canvas.delete("all")
-        self.tk_image = None
-        
-        # 获取画布尺寸
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        # 根据当前标签页加载对应的图像
-        if current_tab == 0:  # 单张模式
-            # 更新单张模式水印去除器的显示尺寸
-            self.watermark_remover.set_display_size(canvas_width, canvas_height)
-            
-            if hasattr(self.watermark_remover, 'image') and self.watermark_remover.image is not None:
-                preview = self.watermark_remover.get_masked_preview()
-                self._show_image(preview)
-        else:  # 批量模式
-            # 更新模板水印去除器的显示尺寸
-            template_remover = self.batch_processor.get_template_remover()
-            if template_remover:
-                template_remover.set_display_size(canvas_width, canvas_height)
-                
-                if hasattr(template_remover, 'image') and template_remover.image is not None:
-                    preview = template_remover.get_masked_preview()
-                    self._show_image(preview)
-                
-        # 更新状态
-        tab_name = "单张去除" if current_tab == 0 else "批量去除"
-        self._update_status(f"切换到{tab_name}模式") 
\ No newline at end of file
+    def destroy(self):
+        """销毁标签页时写入尚未保存的参数，并关闭批量处理的进程池"""
+        if self._config_after_id:
+            self.after_cancel(self._config_after_id)
+            self._flush_config()
+        if self.batch_processor is not None:
+            self.batch_processor.close()
+        super().destroy()
@@ -16,17 +16,40 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-# 导入各功能模块
+# 导入启动时显示的功能模块，其余标签页在首次切换到时才导入和创建
 try:
     from image_tools.watermark import WatermarkRemoverTab
-    from image_tools.convert import FormatConverterTab
-    from image_tools.enhance import ImageEnhancerTab
 except ImportError as e:
     print(f"导入模块时出错: {e}")
     traceback.print_exc()
     messagebox.showerror("导入错误", f"无法加载必要模块: {e}\n请确保已安装所有依赖项。")
     sys.exit(1)
 
+# 共用的ttk样式是否已配置（样式属于Tk解释器，整个程序只需配置一次）
+_styles_configured = False
+
+def _configure_styles():
+    """配置应用程序共用的ttk样式，各标签页不再单独配置样式"""
+    global _styles_configured
+    if _styles_configured:
+        return
+    style = ttk.Style()
+    style.configure("TNotebook", tabposition="nw")
+    style.configure("TNotebook.Tab", padding=[10, 5], font=("微软雅黑", 10))
+    _styles_configured = True
+
+# 延迟加载的标签页在各自的创建函数中静态导入，
+# 首次选中时才执行导入，同时PyInstaller的依赖分析仍能找到这些模块
+def _create_converter_tab(parent):
+    """创建格式转换标签页"""
+    from image_tools.convert import FormatConverterTab
+    return FormatConverterTab(parent)
+
+def _create_enhancer_tab(parent):
+    """创建图像增强标签页"""
+    from image_tools.enhance import ImageEnhancerTab
+    return ImageEnhancerTab(parent)
+
 class ImageToolsApp:
     """图像工具应用程序主类"""
     
@@ -42,10 +65,9 @@ class ImageToolsApp:
         self.root.geometry("1000x700")
         self.root.minsize(800, 600)
         
-        # 创建样式
+        # 创建样式（只在首次创建主窗口时配置）
+        _configure_styles()
         self.style = ttk.Style()
-        self.style.configure("TNotebook", tabposition="nw")
-        self.style.configure("TNotebook.Tab", padding=[10, 5], font=("微软雅黑", 10))
         
         # 创建主框架
         self.main_frame = ttk.Frame(self.root)
@@ -60,13 +82,13 @@ class ImageToolsApp:
             self.watermark_tab = WatermarkRemoverTab(self.notebook)
             self.notebook.add(self.watermark_tab, text="水印去除")
             
-            # 添加格式转换标签页
-            self.converter_tab = FormatConverterTab(self.notebook)
-            self.notebook.add(self.converter_tab, text="格式转换")
-            
-            # 添加图像增强标签页
-            self.enhancer_tab = ImageEnhancerTab(self.notebook)
-            self.notebook.add(self.enhancer_tab, text="图像增强")
+            # 添加格式转换和图像增强标签页（先放置空白页面，首次选中时再创建）
+            self.converter_tab = None
+            self.enhancer_tab = None
+            self._lazy_tabs = {}  # 空白页面ID -> (页面, 属性名, 创建函数)
+            self._built_tabs = {}  # 空白页面ID -> 已创建的标签页
+            self._add_lazy_tab("converter_tab", _create_converter_tab, "格式转换")
+            self._add_lazy_tab("enhancer_tab", _create_enhancer_tab, "图像增强")
             
             # 绑定选项卡切换事件
             self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
@@ -80,18 +102,57 @@ class ImageToolsApp:
             print(f"UI初始化错误: {e}")
             traceback.print_exc()
     
+    def _add_lazy_tab(self, attr, factory, text):
+        """添加一个首次选中时才导入模块并创建的标签页
+        
+        Args:
+            attr: 创建后保存标签页对象的属性名
+            factory: 导入并创建标签页的函数，参数为父页面
+            text: 标签页标题
+        """
+        page = ttk.Frame(self.notebook)
+        self.notebook.add(page, text=text)
+        self._lazy_tabs[str(page)] = (page, attr, factory)
+    
+    def _build_lazy_tab(self, tab_id):
+        """选中的是尚未创建的标签页时导入其模块并在空白页面中创建
+        
+        Args:
+            tab_id: 选中的标签页ID
+        """
+        entry = self._lazy_tabs.pop(str(tab_id), None)
+        if entry is None:
+            return
+        page, attr, factory = entry
+        
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            tab = factory(page)
+            tab.pack(fill=tk.BOTH, expand=True)
+            setattr(self, attr, tab)
+            self._built_tabs[str(tab_id)] = tab
+        except Exception as e:
+            messagebox.showerror("导入错误", f"无法加载必要模块: {e}\n请确保已安装所有依赖项。")
+            traceback.print_exc()
+        finally:
+            self.root.config(cursor="")
+    
     def on_tab_changed(self, event):
         """处理选项卡切换事件"""
         tab_id = self.notebook.select()
         tab_text = self.notebook.tab(tab_id, "text")
         
-        # 调用离开的标签页的事件处理
+        # 首次选中时创建延迟加载的标签页
+        self._build_lazy_tab(tab_id)
+        
+        # 调用离开的标签页的事件处理（未创建的标签页跳过）
         for tab in [self.watermark_tab, self.converter_tab, self.enhancer_tab]:
-            if hasattr(tab, "on_tab_deselected"):
+            if tab is not None and hasattr(tab, "on_tab_deselected"):
                 tab.on_tab_deselected()
         
         # 调用当前选中标签页的事件处理
-        current_tab = event.widget.nametowidget(tab_id)
+        current_tab = self._built_tabs.get(str(tab_id)) or event.widget.nametowidget(tab_id)
         if hasattr(current_tab, "on_tab_selected"):
             current_tab.on_tab_selected()
         
@@ -160,4 +221,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # 打包后的程序需要此调用，批量去水印的工作进程才能正常启动
+    import multiprocessing
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -22,8 +22,18 @@ def main():
         "pyinstaller",
         "--name=图像处理工具",
         "--windowed",  # 无控制台窗口
-        "--onefile",   # 打包为单个可执行文件
+        "--onedir",    # 打包为文件夹，启动时无需先把整个程序解压到临时目录
         f"--icon={icon_path}",
+        # 格式转换、图像增强标签页首次选中时才导入，显式声明以确保被打包
+        "--hidden-import", "image_tools.convert",
+        "--hidden-import", "image_tools.convert.converter_tab",
+        "--hidden-import", "image_tools.enhance",
+        "--hidden-import", "image_tools.enhance.enhancer_tab",
+        # 排除运行时用不到的模块，减小打包体积
+        "--exclude-module", "tkinter.test",
+        "--exclude-module", "numpy.tests",
+        "--exclude-module", "PIL.ImageQt",
+        "--exclude-module", "matplotlib",
         "--clean",     # 清理临时文件
         "--noconfirm", # 不询问确认
         "--add-data", f"README.md{os.pathsep}.",
@@ -36,11 +46,12 @@ def main():
         subprocess.run(cmd, check=True)
         print("打包完成！")
         
-        # 输出文件位置
-        dist_dir = Path("dist")
-        exe_file = dist_dir / "图像处理工具.exe"
+        # 输出文件位置（分发时需要复制整个程序文件夹）
+        app_dir = Path("dist") / "图像处理工具"
+        exe_file = app_dir / "图像处理工具.exe"
         if exe_file.exists():
             print(f"可执行文件已生成: {exe_file.absolute()}")
+            print(f"分发时请复制整个文件夹: {app_dir.absolute()}")
         else:
             print("警告：未找到生成的可执行文件。")
         
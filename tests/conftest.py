@@ -0,0 +1,10 @@
+"""
+测试公共配置
+"""
+import os
+import sys
+
+# 让测试可以直接导入项目根目录下的main.py和image_tools包
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,51 @@
+"""
+主窗口延迟加载标签页测试
+"""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+tk = pytest.importorskip("tkinter")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """创建隐藏的主窗口，并记录创建标签页时弹出的错误"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("没有可用的图形显示环境")
+    root.withdraw()
+
+    import main
+    errors = []
+    monkeypatch.setattr(main.messagebox, "showerror", lambda title, msg: errors.append(msg))
+    application = main.ImageToolsApp(root)
+    application.errors = errors
+    yield application
+    root.destroy()
+
+
+def test_each_lazy_tab_builds(app):
+    """每个延迟加载的标签页都能导入模块并创建"""
+    pending = list(app._lazy_tabs.items())
+    assert pending
+
+    for tab_id, (page, attr, _factory) in pending:
+        app._build_lazy_tab(tab_id)
+
+        assert app.errors == []
+        tab = getattr(app, attr)
+        assert tab is not None
+        assert app._built_tabs[tab_id] is tab
+        assert tab.master is page
+
+    assert app._lazy_tabs == {}
+
+
+def test_image_tools_exports_resolve():
+    """image_tools包按需导入的公开组件都能取到"""
+    import image_tools
+
+    for name in image_tools.__all__:
+        assert getattr(image_tools, name).__name__ == name
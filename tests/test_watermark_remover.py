@@ -0,0 +1,50 @@
+"""
+水印去除核心算法测试
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from image_tools.watermark.watermark_remover import WatermarkRemover, _inpaint_poisson
+
+
+def test_poisson_fill_ignores_small_strokes_inside_large_region():
+    """大区域包围盒内的小笔画颜色不应渗入调和插值的结果"""
+    background = (128, 128, 128)
+    watermark = (255, 0, 0)
+    image = np.full((160, 160, 3), background, dtype=np.uint8)
+    mask = np.zeros((160, 160), dtype=np.uint8)
+
+    # L形大区域（包围盒80x80），包围盒内另有一条不相连的细笔画
+    mask[20:100, 20:40] = 255
+    mask[80:100, 20:100] = 255
+    large = mask > 0
+    mask[30:33, 60:90] = 255
+    image[mask > 0] = watermark
+
+    _inpaint_poisson(image, mask, cv2.boundingRect(mask), 3, cv2.INPAINT_TELEA)
+
+    filled = image[large].astype(np.int16)
+    assert np.abs(filled - np.array(background, dtype=np.int16)).max() <= 2
+
+
+@pytest.mark.parametrize("image_size, display_size", [
+    ((1000, 750), (800, 600)),
+    ((640, 480), (1000, 700)),
+    ((333, 777), (512, 512)),
+])
+def test_batch_and_scalar_canvas_transforms_agree(image_size, display_size):
+    """批量坐标转换与单点转换对同一画布坐标给出相同的图像坐标"""
+    remover = WatermarkRemover()
+    img_w, img_h = image_size
+    remover.set_image(np.zeros((img_h, img_w, 3), dtype=np.uint8))
+    remover.set_display_size(*display_size)
+
+    points = [(x, y) for x in range(-5, display_size[0] + 5, 7)
+              for y in range(-5, display_size[1] + 5, 11)]
+    points.append((400, 300))
+
+    batch = remover._canvas_points_to_image(points)
+    scalar = [remover.canvas_to_image_coords(p) for p in points]
+    assert [tuple(p) for p in batch.tolist()] == [tuple(p) for p in scalar]